@@ -1,237 +1,346 @@
-import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-from tavily import TavilyClient
-from firecrawl import Firecrawl
-from fpdf import FPDF
+import io
+import sys
+import orjson
+import asyncio
+import functools
+from collections import OrderedDict
+from openai import AsyncOpenAI
+from tavily import AsyncTavilyClient
+from firecrawl import AsyncFirecrawl
+from xml.sax.saxutils import escape
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem
+from config import OPENAI_API_KEY, TAVILY_API_KEY, FIRECRAWL_API_KEY  # loaded from .env once in config.py
+from llm_cache import async_stream_chat_completion, cached_completion, async_embed, semantic_lookup, semantic_store, truncate_tokens
 
-# Load keys for OpenAI, Tavily, and Firecrawl
-load_dotenv()
+# Initialize async clients so several companies can be processed at once
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+tavily_client = AsyncTavilyClient(api_key=TAVILY_API_KEY)
+firecrawl_app = AsyncFirecrawl(api_key=FIRECRAWL_API_KEY)
 
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
-FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
+# Maximum number of company pipelines running at the same time
+MAX_CONCURRENCY = 5
 
-# Initialize clients
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-firecrawl_app = Firecrawl(api_key=FIRECRAWL_API_KEY)
+# Website text sent to the model, in tokens (kept well below the cached system prompt)
+WEBSITE_TOKEN_BUDGET = 750
+
+# Invariant SWOT instructions. Keep this text identical between calls (no company
+# name or other dynamic data) and longer than 1,024 tokens: OpenAI only caches
+# prompt prefixes past that size, which cuts input cost and time-to-first-token.
+SWOT_SYSTEM_PROMPT = """Act as a VC Investor. You write SWOT analyses for investment memos that are read by partners deciding whether to take a first meeting with a company.
+
+You will receive the company name, a summary of web search results about the company, and the text of the company's website. Use only that material plus widely known public facts about the company's market. Do not invent figures, customers, funding rounds, or quotes; if the material does not support a claim, leave it out.
+
+Return valid JSON with keys: 'strengths', 'weaknesses', 'opportunities', 'threats' (each a list of strings) and 'summary' (a 2-sentence overview).
+
+Guidelines for each key:
+
+'strengths' - internal advantages the company already has today. Good strengths are specific and checkable: a named product capability, a distribution channel, a pricing advantage, a network effect, a regulatory licence, a brand position, a technical moat, or a visible customer segment the company already serves well. For each strength, say briefly why it matters to an investor (for example, it lowers customer acquisition cost, raises switching costs, or expands margins).
+
+'weaknesses' - internal limitations the company has today. Look for concentration risk (one product, one customer type, one geography), unclear monetisation, dependence on a single platform or partner, thin differentiation, operational complexity, or gaps that are visible on the website (missing pricing, missing enterprise features, missing integrations). Be fair: a weakness should be something management could realistically fix or must manage, not a generic complaint.
+
+'opportunities' - external trends or openings the company is positioned to exploit. Tie each opportunity to something the company already has: adjacent customer segments, new geographies, upsell or cross-sell paths, partnerships, platform shifts, or regulatory changes. Prefer opportunities that could plausibly move revenue within two to three years.
+
+'threats' - external forces that could hurt the company. Consider direct competitors, well-funded incumbents moving into the space, substitutes, pricing pressure, platform or regulatory risk, macroeconomic sensitivity of the customer base, and security or trust risks. Name competitors when the material or common knowledge makes them obvious.
+
+'summary' - exactly two sentences. The first sentence states what the company does and for whom. The second sentence gives the investment takeaway: the single most important reason to be interested and the single most important risk.
+
+Style rules:
+- Write 3 to 5 items for each of the four SWOT lists.
+- Each item is one or two sentences of plain English, written for a busy investor.
+- Start each item with the point itself, not with filler such as "The company has" or "There is".
+- Prefer concrete nouns and numbers from the material over adjectives such as "innovative", "leading", or "robust".
+- Do not repeat the same idea in two lists; if something is both a strength and a risk, put it where it matters most.
+- Do not use bullet characters, numbering, or markdown inside the strings; the memo template adds its own formatting.
+- Use straight quotes and plain hyphens rather than typographic quotes, bullets, or long dashes.
+- Keep company and product names exactly as the company writes them.
+- If the search results and the website disagree, prefer the website for product facts and the search results for news, funding, and market context.
+- If the material is thin (for example the website could not be scraped), still return all five keys, keep the lists short, and say in the summary that the analysis is based on limited information.
+
+How to read the inputs:
+- The company name is the name the user typed. It may be informal or misspelled; use the official name from the website or search results in your output.
+- The search context contains up to three web results, each with a title, a URL, and a short content excerpt. Treat the excerpts as snippets, not full articles. Results from the company's own domain describe how the company sees itself; results from news sites, review sites, and analysts are better evidence of traction and reputation.
+- The website content is markdown scraped from the company's home page and may be truncated. It often contains navigation menus, cookie banners, footers, and repeated calls to action; ignore those and focus on product descriptions, customer logos, pricing, case studies, and headline claims.
+- Headline marketing claims (for example "trusted by millions") are the company's own statements. You may use them, but phrase them as claims ("the company says...") unless the search results confirm them.
+- Dates matter. If the material mentions launches, layoffs, acquisitions, or funding, prefer the most recent events and do not describe old events as current.
+
+Example of the expected shape (content is illustrative only):
+{
+  "strengths": ["Self-serve onboarding lets small merchants launch a store in under an hour, which keeps acquisition costs low.", "A large app marketplace creates switching costs because merchants build workflows on third-party extensions."],
+  "weaknesses": ["Revenue depends heavily on small merchants, who churn faster in downturns."],
+  "opportunities": ["Expanding payments and lending products can raise revenue per merchant without new customer acquisition."],
+  "threats": ["Large marketplaces and social platforms are adding native checkout, which could divert merchant sales."],
+  "summary": "The company sells commerce software to merchants of all sizes. Its ecosystem is the main reason to invest, while dependence on small merchants is the main risk."
+}
+
+Return ONLY valid JSON with no additional text."""
+
+# Paragraph styles for the PDF memo
+_STYLES = getSampleStyleSheet()
+
+
+def _async_lru_cache(maxsize=256):
+    """functools.lru_cache for coroutine functions.
+
+    The task is cached rather than the coroutine, so concurrent calls with the same
+    arguments share one in-flight request. Each caller awaits it through asyncio.shield,
+    so cancelling one caller doesn't cancel the others. Tasks that fail, are cancelled
+    or return an empty result (e.g. failed scrapes) are dropped so they get retried next time.
+    """
+    def decorator(func):
+        cache = OrderedDict()
+
+        @functools.wraps(func)
+        async def wrapper(*args):
+            task = cache.get(args)
+            if task is None:
+                task = asyncio.create_task(func(*args))
+                cache[args] = task
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+
+                def evict_unusable(done, args=args):
+                    if done.cancelled() or done.exception() is not None or not done.result():
+                        # A newer task may already be cached under these arguments
+                        if cache.get(args) is done:
+                            del cache[args]
+
+                task.add_done_callback(evict_unusable)
+            else:
+                cache.move_to_end(args)
+            return await asyncio.shield(task)
+
+        return wrapper
+    return decorator
 
 
 # The Workflow Functions
 
 # 1. get_company_info(company_name)
-def get_company_info(company_name):
-    """Use Tavily to search for company website and return URL + summary."""
+async def get_company_info(company_name):
+    """Use Tavily to search for company website and return the top two candidate URLs + summary."""
     query = f'{company_name} official website home page'
-    search_response = tavily_client.search(
+    search_response = await tavily_client.search(
         query=query,
         max_results=3
     )
     
-    # Extract the top URL
+    # Extract the two candidate URLs run_pipeline scrapes (the first one is the most likely home page)
     results = search_response.get('results', [])
-    if not results:
-        return None, "No search results found"
-    
-    top_url = results[0].get('url', '')
+    urls = tuple(result['url'] for result in results if result.get('url'))[:2]
+    if not urls:
+        return (), "No search results found"
     
     # Return a summary of the top 3 search results (news/context)
-    summary = ""
+    parts = []
     for i, result in enumerate(results[:3], 1):
-        summary += f"Result {i}:\n"
-        summary += f"Title: {result.get('title', 'N/A')}\n"
-        summary += f"URL: {result.get('url', 'N/A')}\n"
-        summary += f"Content: {result.get('content', 'N/A')[:300]}...\n\n"
+        parts.append(
+            f"Result {i}:\n"
+            f"Title: {result.get('title', 'N/A')}\n"
+            f"URL: {result.get('url', 'N/A')}\n"
+            f"Content: {result.get('content', 'N/A')[:300]}...\n"
+        )
     
-    return top_url, summary
+    return urls, "\n".join(parts)
 
 
-# 2. analyze_website(url)
-def analyze_website(url):
-    """Use Firecrawl to scrape the URL (markdown format). Return first 5,000 characters."""
+# 2. analyze_website(urls)
+@_async_lru_cache(maxsize=256)
+async def analyze_website(urls):
+    """Use Firecrawl to scrape the candidate URLs (markdown format). Return first 5,000 characters of the richest page."""
     try:
-        scrape_result = firecrawl_app.scrape(url, formats=['markdown'])
-        markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
+        if len(urls) == 1:
+            documents = [await firecrawl_app.scrape(urls[0], formats=['markdown'])]
+        else:
+            # One batch job scrapes all candidates in parallel instead of one browser launch per URL
+            batch_job = await firecrawl_app.batch_scrape(list(urls), formats=['markdown'])
+            documents = batch_job.data
         
-        # Return the first 5,000 characters (to save tokens)
-        return markdown_content[:5000]
+        pages = [(doc.markdown if hasattr(doc, 'markdown') else str(doc)) or "" for doc in documents]
+        
+        # Keep whichever page returned more content, and its first 5,000 characters (to save tokens)
+        return max(pages, key=len, default="")[:5000]
     except Exception as e:
         print(f"Error scraping website: {e}")
         return ""
 
 
 # 3. generate_swot(company_name, search_summary, website_content)
-def generate_swot(company_name, search_summary, website_content):
+async def generate_swot(company_name, search_summary, website_content):
     """Send all data to gpt-4o-mini to generate SWOT analysis in JSON format."""
-    prompt = f"""Act as a VC Investor. Write a detailed SWOT analysis for {company_name}.
-
-Return valid JSON with keys: 'strengths', 'weaknesses', 'opportunities', 'threats' (each a list of strings) and 'summary' (a 2-sentence overview).
+    # Truncate by tokens rather than characters so dense markdown doesn't blow the budget
+    website_content = truncate_tokens(website_content, WEBSITE_TOKEN_BUDGET)
+    
+    # Static instructions go in the system message and dynamic data goes last,
+    # so every call shares the same long prefix for OpenAI prompt caching
+    messages = [
+        {"role": "system", "content": SWOT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"""Company: {company_name}
 
 Search Context:
 {search_summary}
 
 Website Content:
-{website_content[:3000]}
+{website_content}"""}
+    ]
 
-Return ONLY valid JSON with no additional text."""
-
-    response = openai_client.chat.completions.create(
+    # temperature=0 keeps the answer deterministic so repeat runs are served from the on-disk cache
+    request = dict(
         model="gpt-4o-mini",
-        messages=[
-            {"role": "user", "content": prompt}
-        ],
-        response_format={"type": "json_object"}
+        messages=messages,
+        response_format={"type": "json_object"},
+        temperature=0
     )
     
-    json_response = response.choices[0].message.content
-    return json.loads(json_response)
+    # An exact repeat is answered from disk without paying for an embeddings round trip
+    json_response = cached_completion(**request)
+    if json_response is not None:
+        return orjson.loads(json_response)
+    
+    # Near-duplicate inputs (same company, slightly different scrape) reuse an earlier SWOT.
+    # Entries are scoped per company so two similar-looking sites never share an answer.
+    # The semantic cache is best-effort: if embedding fails, fall through to the completion.
+    namespace = f"swot:{company_name.strip().lower()}"
+    embedding = None
+    try:
+        embedding = await async_embed(openai_client, f"{company_name}\n\n{website_content}")
+        cached_swot = semantic_lookup(namespace, embedding)
+        if cached_swot is not None:
+            return orjson.loads(cached_swot)
+    except Exception as e:
+        print(f"Semantic cache unavailable for {company_name}: {e}")
+    
+    # Stream the response and collect the chunks as they arrive
+    chunks = []
+    async for delta in async_stream_chat_completion(openai_client, **request):
+        chunks.append(delta)
+    
+    json_response = "".join(chunks)
+    swot_data = orjson.loads(json_response)
+    if embedding is not None:
+        try:
+            semantic_store(namespace, embedding, json_response)
+        except Exception as e:
+            print(f"Could not store {company_name} in the semantic cache: {e}")
+    return swot_data
 
 
-# Helper function to sanitize text for PDF (remove unsupported Unicode)
-def sanitize_text(text):
-    """Remove or replace Unicode characters that FPDF can't handle."""
-    if not text:
-        return ""
-    # Convert to string if not already
-    text = str(text)
-    # Replace common Unicode characters with ASCII equivalents
-    replacements = {
-        '\u2022': '-',  # bullet point
-        '\u2013': '-',  # en dash
-        '\u2014': '-',  # em dash
-        '\u2018': "'",  # left single quote
-        '\u2019': "'",  # right single quote
-        '\u201C': '"',  # left double quote
-        '\u201D': '"',  # right double quote
-        '\u2026': '...',  # ellipsis
-    }
-    result = text
-    for unicode_char, replacement in replacements.items():
-        result = result.replace(unicode_char, replacement)
-    # Remove any remaining non-ASCII characters that can't be encoded
-    try:
-        return result.encode('latin-1', errors='replace').decode('latin-1')
-    except:
-        # Fallback: just replace problematic chars
-        return ''.join(c if ord(c) < 256 else '?' for c in result)
+# Helper function to build one SWOT section (header + bullet list)
+def _render_section(title, items):
+    """Return the flowables for a section header followed by its bullet list."""
+    flowables = [Paragraph(title, _STYLES['Heading2'])]
+    # Paragraph text is XML-like markup, so escape &, < and > from the model output
+    bullets = [ListItem(Paragraph(escape(str(x)), _STYLES['BodyText'])) for x in items if str(x).strip()]
+    if bullets:
+        flowables.append(ListFlowable(bullets, bulletType='bullet'))
+    flowables.append(Spacer(1, 5 * mm))
+    return flowables
 
 
 # 4. save_pdf(company_name, swot_data)
-def save_pdf(company_name, swot_data):
-    """Use FPDF to create a clean PDF with SWOT analysis."""
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    
-    # Get page width (A4 width minus margins)
-    effective_width = pdf.w - 2 * pdf.l_margin
+def save_pdf(company_name, swot_data, out=None):
+    """Use ReportLab to create a clean PDF with SWOT analysis. Return the PDF bytes, also written to out if given."""
+    # Render into memory so callers (e.g. st.download_button) can use the bytes without a temp file
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, leftMargin=15 * mm, rightMargin=15 * mm,
+                            topMargin=15 * mm, bottomMargin=15 * mm)
     
     # Title: 'Investment Memo: {company_name}'
-    pdf.set_font("Arial", "B", 20)
-    pdf.cell(effective_width, 10, sanitize_text(f"Investment Memo: {company_name}"), new_x="LMARGIN", new_y="NEXT", align="C")
-    pdf.ln(10)
-    
-    # Sections: Summary, Strengths, Weaknesses, Opportunities, Threats
-    pdf.set_font("Arial", "B", 14)
+    story = [Paragraph(escape(f"Investment Memo: {company_name}"), _STYLES['Title'])]
     
     # Summary
-    pdf.cell(effective_width, 10, "Summary", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("Arial", "", 11)
-    pdf.set_x(pdf.l_margin)  # Ensure we start at left margin
     summary = swot_data.get('summary', 'No summary available.')
-    pdf.multi_cell(effective_width, 6, sanitize_text(summary))
-    pdf.ln(5)
-    
-    # Strengths
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_x(pdf.l_margin)  # Reset to left margin
-    pdf.cell(effective_width, 10, "Strengths", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("Arial", "", 11)
-    for strength in swot_data.get('strengths', []):
-        # Use dash instead of bullet point to avoid encoding issues
-        pdf.set_x(pdf.l_margin)  # Reset to left margin for each item
-        sanitized_strength = sanitize_text(f"- {strength}")
-        if sanitized_strength.strip():  # Only add if not empty
-            pdf.multi_cell(effective_width, 6, sanitized_strength)
-    pdf.ln(5)
-    
-    # Weaknesses
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_x(pdf.l_margin)  # Reset to left margin
-    pdf.cell(effective_width, 10, "Weaknesses", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("Arial", "", 11)
-    for weakness in swot_data.get('weaknesses', []):
-        pdf.set_x(pdf.l_margin)  # Reset to left margin for each item
-        sanitized_weakness = sanitize_text(f"- {weakness}")
-        if sanitized_weakness.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_weakness)
-    pdf.ln(5)
-    
-    # Opportunities
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_x(pdf.l_margin)  # Reset to left margin
-    pdf.cell(effective_width, 10, "Opportunities", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("Arial", "", 11)
-    for opportunity in swot_data.get('opportunities', []):
-        pdf.set_x(pdf.l_margin)  # Reset to left margin for each item
-        sanitized_opportunity = sanitize_text(f"- {opportunity}")
-        if sanitized_opportunity.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_opportunity)
-    pdf.ln(5)
-    
-    # Threats
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_x(pdf.l_margin)  # Reset to left margin
-    pdf.cell(effective_width, 10, "Threats", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_font("Arial", "", 11)
-    for threat in swot_data.get('threats', []):
-        pdf.set_x(pdf.l_margin)  # Reset to left margin for each item
-        sanitized_threat = sanitize_text(f"- {threat}")
-        if sanitized_threat.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_threat)
+    story.append(Paragraph("Summary", _STYLES['Heading2']))
+    story.append(Paragraph(escape(str(summary)), _STYLES['BodyText']))
+    story.append(Spacer(1, 5 * mm))
     
-    # Save as '{company_name}_Memo.pdf'
-    filename = f"{company_name}_Memo.pdf"
-    pdf.output(filename)
-    return filename
+    # Strengths, Weaknesses, Opportunities, Threats
+    for key, title in [('strengths', 'Strengths'), ('weaknesses', 'Weaknesses'),
+                       ('opportunities', 'Opportunities'), ('threats', 'Threats')]:
+        story.extend(_render_section(title, swot_data.get(key, [])))
+    
+    # Lay out the whole memo in one pass
+    doc.build(story)
+    data = buffer.getvalue()
+    
+    if out is not None:
+        with open(out, 'wb') as f:
+            f.write(data)
+    return data
 
 
-# The Main Execution
-if __name__ == "__main__":
-    # Define company = 'Shopify'
-    company = 'Shopify'
-    
-    # Print '🔍 Searching for Shopify...'
+# Batch entry point: save_pdfs([(company_name, swot_data, out), ...])
+def save_pdfs(items):
+    """Render several memos with save_pdf. Return their PDF bytes in the same order.
+
+    A one-page memo lays out in about 10 ms, less than starting a worker process, so they're rendered in-process.
+    """
+    return [save_pdf(*item) for item in items]
+
+
+# 5. run_pipeline(company)
+async def run_pipeline(company):
+    """Run search -> scrape -> SWOT for one company and save its PDF. Return the filename."""
     print(f'🔍 Searching for {company}...')
     
     # Run Step 1
-    url, search_summary = get_company_info(company)
-    if not url:
+    urls, search_summary = await get_company_info(company)
+    if not urls:
         print(f"Error: Could not find website for {company}")
-        exit(1)
-    print(f"Found website: {url}")
+        return None
+    print(f"Found website for {company}: {urls[0]}")
     
-    # Print '🕷️ Scraping website...'
-    print('🕷️ Scraping website...')
+    # Run Step 2: Tavily's top hit isn't always the home page, so scrape the top two
+    # candidates in one batch job and keep whichever returned more content
+    print(f'🕷️ Scraping {len(urls)} candidate pages for {company}...')
+    website_content = await analyze_website(urls)
+    print(f"Scraped {len(website_content)} characters for {company}")
     
-    # Run Step 2
-    website_content = analyze_website(url)
-    print(f"Scraped {len(website_content)} characters")
+    # Run Step 3
+    print(f'🧠 Analyzing data for {company}...')
+    swot_data = await generate_swot(company, search_summary, website_content)
+    print(f"SWOT analysis generated for {company}")
     
-    # Print '🧠 Analyzing data...'
-    print('🧠 Analyzing data...')
+    # Run Step 4 (ReportLab is synchronous, so keep it off the event loop)
+    # Save as '{company_name}_Memo.pdf'
+    print(f'📄 Generating PDF for {company}...')
+    filename = f"{company}_Memo.pdf"
+    await asyncio.to_thread(save_pdf, company, swot_data, filename)
+    return filename
+
+
+# 6. run_many(companies, max_concurrency)
+async def run_many(companies, max_concurrency=MAX_CONCURRENCY):
+    """Run run_pipeline for every company concurrently, at most max_concurrency at a time."""
+    semaphore = asyncio.BoundedSemaphore(max_concurrency)
     
-    # Run Step 3
-    swot_data = generate_swot(company, search_summary, website_content)
-    print("SWOT analysis generated")
+    async def run_bounded(company):
+        async with semaphore:
+            return await run_pipeline(company)
     
-    # Print '📄 Generating PDF...'
-    print('📄 Generating PDF...')
+    tasks = [asyncio.create_task(run_bounded(company)) for company in companies]
+    # Keep going if one company fails; errors are returned in place of filenames
+    return await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# The Main Execution
+if __name__ == "__main__":
+    # Companies come from the command line, e.g. `python analyst.py Shopify Stripe`
+    companies = sys.argv[1:] or ['Shopify']
+    
+    results = asyncio.run(run_many(companies))
     
-    # Run Step 4
-    filename = save_pdf(company, swot_data)
+    failed = False
+    for company, result in zip(companies, results):
+        if isinstance(result, Exception):
+            print(f"Error analyzing {company}: {result}")
+            failed = True
+        elif not result:
+            failed = True
+        else:
+            print(f'✅ Done! Check your folder. File saved as: {result}')
     
-    # Print '✅ Done! Check your folder.'
-    print(f'✅ Done! Check your folder. File saved as: {filename}')
+    if failed:
+        exit(1)
@@ -1,17 +1,59 @@
-import os
 import streamlit as st
-from dotenv import load_dotenv
 from openai import OpenAI
 from firecrawl import Firecrawl
+from config import OPENAI_API_KEY, FIRECRAWL_API_KEY  # loaded from .env once in config.py
+from llm_cache import cached_chat_completion, truncate_tokens
 
 # Configure page (this helps with context initialization)
 st.set_page_config(page_title="Competitor Intelligence Agent", page_icon="🕵️‍♂️")
 
-# Load API keys from .env
-load_dotenv()
+# Landing page text sent to the model, in tokens
+PAGE_TOKEN_BUDGET = 3000
+
+
+# Share one client of each kind across reruns so HTTPS connections stay warm
+@st.cache_resource
+def get_firecrawl():
+    """Return the shared Firecrawl client."""
+    return Firecrawl(api_key=FIRECRAWL_API_KEY)
+
+
+@st.cache_resource
+def get_openai():
+    """Return the shared OpenAI client."""
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+
+# Cache scrapes per URL so re-analyzing the same page skips Firecrawl for an hour
+@st.cache_data(ttl=3600, show_spinner=False)
+def scrape_markdown(url):
+    """Scrape the URL with Firecrawl and return its markdown content."""
+    scrape_result = get_firecrawl().scrape(url, formats=['markdown'])
+    
+    # Extract markdown content from the result object
+    return scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
+
+
+# Cache the whole scrape + analysis per URL so repeat clicks return the report instantly
+@st.cache_data(ttl=3600, show_spinner=False)
+def analyze(url):
+    """Scrape the URL and return gpt-4o-mini's markdown report on it."""
+    # Scrape the URL (markdown format), reusing a cached result when available
+    markdown_content = scrape_markdown(url)
+    
+    prompt = 'Analyze this landing page. Return a markdown report with headers for: Value Prop, Pricing, and Target Audience.'
+    
+    return cached_chat_completion(
+        get_openai(),
+        model="gpt-4o-mini",
+        messages=[
+            # Static instructions first, page content last, so the prompt prefix can be cached
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": f"Landing page content:\n{truncate_tokens(markdown_content, PAGE_TOKEN_BUDGET)}"}
+        ],
+        temperature=0
+    )
 
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
 
 # The UI Layout
 st.title('🕵️‍♂️ Competitor Intelligence Agent')
@@ -26,33 +68,9 @@ if st.button('Analyze Strategy'):
         st.error('Please enter a URL')
     else:
         try:
-            # Show a loading spinner ('Scraping website...')
-            with st.spinner('Scraping website...'):
-                # Initialize FirecrawlApp and scrape the URL (markdown format)
-                firecrawl_app = Firecrawl(api_key=FIRECRAWL_API_KEY)
-                scrape_result = firecrawl_app.scrape(url, formats=['markdown'])
-                
-                # Extract markdown content from the result object
-                markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
-            
-            # Show a success message ('Scraping complete!')
-            st.success('Scraping complete!')
-            
-            # Send the markdown to gpt-4o-mini with the prompt
-            with st.spinner('Analyzing content...'):
-                openai_client = OpenAI(api_key=OPENAI_API_KEY)
-                
-                prompt = 'Analyze this landing page. Return a markdown report with headers for: Value Prop, Pricing, and Target Audience.'
-                
-                response = openai_client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "user", "content": f"{prompt}\n\nLanding page content:\n{markdown_content}"}
-                    ]
-                )
-                
-                # Get the result
-                report = response.choices[0].message.content
+            # Show a loading spinner while the page is scraped and analyzed
+            with st.spinner('Analyzing website...'):
+                report = analyze(url)
             
             # Display the result using st.markdown()
             st.markdown("## Analysis Report")
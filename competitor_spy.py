@@ -1,43 +1,17 @@
-import os
-import json
-from dotenv import load_dotenv
-from openai import OpenAI
-from firecrawl import Firecrawl
-
-# Load OPENAI_API_KEY and FIRECRAWL_API_KEY from .env
-load_dotenv()
-
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
+import sys
+import orjson
+import asyncio
+from openai import AsyncOpenAI
+from firecrawl import AsyncFirecrawl
+from config import OPENAI_API_KEY, FIRECRAWL_API_KEY  # loaded from .env once in config.py
+from llm_cache import async_cached_chat_completion, truncate_tokens
 
 # Initialize clients
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-app = Firecrawl(api_key=FIRECRAWL_API_KEY)
-
-# Define a variable url (set it to 'https://vibecodeapp.com' or any startup website you like)
-url = 'https://vibecodeapp.com'
+openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY)
+app = AsyncFirecrawl(api_key=FIRECRAWL_API_KEY)
 
-# Step 1 (Scrape): Use app.scrape(url, formats=['markdown']) to get the page content
-print(f"Step 1: Scraping {url}...")
-
-# Error Handling: Wrap the scrape in a try/except block in case the URL is blocked
-try:
-    scrape_result = app.scrape(url, formats=['markdown'])
-    
-    # Extract markdown content from the result object
-    markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
-    
-    # Print 'Scraping complete. Content length: [length] characters'
-    content_length = len(markdown_content)
-    print(f"Scraping complete. Content length: {content_length} characters")
-    
-except Exception as e:
-    print(f"Error scraping URL: {e}")
-    print("Exiting due to scraping failure.")
-    exit(1)
-
-# Step 2 (Analyze): Send the markdown content to gpt-4o-mini
-print("\nStep 2: Analyzing content with GPT-4o-mini...")
+# Landing page text sent to the model, in tokens
+PAGE_TOKEN_BUDGET = 3000
 
 prompt = """You are a Market Research Expert. Analyze this landing page content. Extract the following in strict JSON format:
 
@@ -48,26 +22,75 @@ prompt = """You are a Market Research Expert. Analyze this landing page content.
 
 Return ONLY valid JSON with no additional text."""
 
-response = openai_client.chat.completions.create(
-    model="gpt-4o-mini",
-    messages=[
-        {"role": "user", "content": f"{prompt}\n\nLanding page content:\n{markdown_content}"}
-    ],
-    response_format={"type": "json_object"}  # Ensure JSON response
-)
 
-# Extract and parse JSON
-json_response = response.choices[0].message.content
+async def analyze_url(url):
+    """Scrape one URL, extract strategic insights with gpt-4o-mini and print them. Return False on failure."""
+    # Step 1 (Scrape): Use app.scrape(url, formats=['markdown']) to get the page content
+    print(f"Step 1: Scraping {url}...")
+    
+    # Error Handling: Wrap the scrape in a try/except block in case the URL is blocked
+    try:
+        scrape_result = await app.scrape(url, formats=['markdown'])
+        
+        # Extract markdown content from the result object
+        markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
+        
+        # Print 'Scraping complete. Content length: [length] characters'
+        content_length = len(markdown_content)
+        print(f"Scraping complete for {url}. Content length: {content_length} characters")
+        
+    except Exception as e:
+        print(f"Error scraping {url}: {e}")
+        return False
+    
+    # Step 2 (Analyze): Send the markdown content to gpt-4o-mini
+    print(f"\nStep 2: Analyzing {url} with GPT-4o-mini...")
+    
+    # Repeat runs on the same page are served from the on-disk cache (requires temperature=0)
+    json_response = await async_cached_chat_completion(
+        openai_client,
+        model="gpt-4o-mini",
+        messages=[
+            # Static instructions first, page content last, so the prompt prefix can be cached
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": f"Landing page content:\n{truncate_tokens(markdown_content, PAGE_TOKEN_BUDGET)}"}
+        ],
+        response_format={"type": "json_object"},  # Ensure JSON response
+        temperature=0
+    )
+    
+    # Print the JSON output clearly (in one go, so concurrent runs don't interleave)
+    try:
+        # Try to parse and pretty-print JSON
+        output = orjson.dumps(orjson.loads(json_response), option=orjson.OPT_INDENT_2).decode()
+    except orjson.JSONDecodeError:
+        # If parsing fails, print raw response
+        output = json_response
+    print(f"\n{'='*60}\nStrategic Insights for {url} (JSON):\n{'='*60}\n{output}\n{'='*60}\n")
+    return True
+
+
+async def warm_up_openai():
+    """Open the OpenAI connection while Firecrawl scrapes, so the completion starts on a warm connection."""
+    try:
+        await openai_client.models.list()
+    except Exception:
+        # Only an optimization; the completion call reports real errors
+        pass
+
+
+async def main(urls):
+    """Analyze every URL concurrently. Return True if all of them succeeded."""
+    tasks = [analyze_url(url) for url in urls]
+    if len(urls) == 1:
+        tasks.append(warm_up_openai())
+    results = await asyncio.gather(*tasks)
+    return all(results[:len(urls)])
+
 
-# Print the JSON output clearly
-print("\n" + "="*60)
-print("Strategic Insights (JSON):")
-print("="*60)
-try:
-    # Try to parse and pretty-print JSON
-    parsed_json = json.loads(json_response)
-    print(json.dumps(parsed_json, indent=2))
-except json.JSONDecodeError:
-    # If parsing fails, print raw response
-    print(json_response)
-print("="*60 + "\n")
+if __name__ == '__main__':
+    # Pass one or more URLs on the command line (defaults to 'https://vibecodeapp.com')
+    urls = sys.argv[1:] or ['https://vibecodeapp.com']
+    if not asyncio.run(main(urls)):
+        print("Exiting due to scraping failure.")
+        sys.exit(1)
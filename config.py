@@ -0,0 +1,31 @@
+import os
+import functools
+import tiktoken
+from dotenv import load_dotenv
+
+# Load keys for OpenAI, Tavily, and Firecrawl once per process
+load_dotenv()
+
+OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
+FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
+
+# Maximum number of Firecrawl scrapes in flight at once (keeps us under the plan's rate limit)
+FIRECRAWL_CONCURRENCY = int(os.getenv('FIRECRAWL_CONCURRENCY', 2))
+
+# Skip scraping the company website when the top search snippets already hold at least this many characters
+SKIP_SCRAPE_THRESHOLD = int(os.getenv('SKIP_SCRAPE_THRESHOLD', 3000))
+
+# On-disk LLM cache: file location and entry lifetime in seconds (default 7 days)
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', '.llm_cache.sqlite3')
+LLM_CACHE_TTL = float(os.getenv('LLM_CACHE_TTL', 7 * 24 * 3600))
+
+# Semantic cache: minimum cosine similarity to reuse a stored response (set above 1 to disable)
+LLM_SEMANTIC_THRESHOLD = float(os.getenv('LLM_SEMANTIC_THRESHOLD', 0.95))
+
+# Tokenizer for gpt-4o-mini, built on first use and then once per process (the BPE table is ~1MB
+# and is downloaded on a cold start, so modules that never tokenize shouldn't load it)
+@functools.cache
+def get_encoder():
+    """Return the shared gpt-4o-mini tokenizer."""
+    return tiktoken.encoding_for_model("gpt-4o-mini")
@@ -1,36 +1,172 @@
 import os
-import json
+import re
+import csv
+import hashlib
 import time
+import threading
+import orjson
 from datetime import datetime
+from types import MappingProxyType
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
-from dotenv import load_dotenv
 from openai import OpenAI
 from tavily import TavilyClient
 from firecrawl import Firecrawl
 from fpdf import FPDF
 import yfinance as yf
+from config import OPENAI_API_KEY, TAVILY_API_KEY, FIRECRAWL_API_KEY, FIRECRAWL_CONCURRENCY, SKIP_SCRAPE_THRESHOLD  # loaded from .env once in config.py
+from llm_cache import cached_chat_completion, stream_chat_completion, parse_partial_json, disk_cache, stats as llm_cache_stats
 
 # Set page config to 'Wide Mode' with a title '💰 Scott's Company Analysis'
 st.set_page_config(page_title="💰 Scott's Company Analysis", page_icon="💰", layout="wide")
 
-# Load API keys from .env
-load_dotenv()
+# How long cached LLM answers stay valid, in seconds
+TICKER_CACHE_TTL = 7 * 24 * 3600  # tickers rarely change
+SWOT_CACHE_TTL = 24 * 3600  # keep memos reasonably fresh
+SEARCH_CACHE_TTL = 6 * 3600
+SCRAPE_CACHE_TTL = 24 * 3600
+# Finished analyses are kept in session state and reused for this long
+RESULT_TTL = 3600
 
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-TAVILY_API_KEY = os.getenv('TAVILY_API_KEY')
-FIRECRAWL_API_KEY = os.getenv('FIRECRAWL_API_KEY')
+# Website text passed to the SWOT prompt, in characters (after links and extra whitespace are stripped)
+WEBSITE_CONTENT_CHARS = 2500
+
+# Firecrawl attempts per URL when rate limited or given an empty page
+FIRECRAWL_MAX_RETRIES = 3
+# Server-side limit for a single scrape, in milliseconds
+FIRECRAWL_TIMEOUT_MS = 15000
+
+# Initialize clients once per server process (Streamlit re-runs this script on every interaction),
+# so their HTTP connection pools and keep-alive connections survive reruns
+@st.cache_resource
+def get_clients():
+    """Return the shared OpenAI, Tavily and Firecrawl clients."""
+    return OpenAI(api_key=OPENAI_API_KEY), TavilyClient(api_key=TAVILY_API_KEY), Firecrawl(api_key=FIRECRAWL_API_KEY)
+
+
+openai_client, tavily_client, firecrawl_app = get_clients()
+
+
+@st.cache_resource
+def get_firecrawl_semaphore():
+    """Return the process-wide semaphore limiting concurrent Firecrawl scrapes."""
+    return threading.BoundedSemaphore(FIRECRAWL_CONCURRENCY)
+
+
+firecrawl_semaphore = get_firecrawl_semaphore()
+
+# System message for generate_swot (kept constant so it is part of the cached prompt prefix)
+SWOT_SYSTEM_MESSAGE = "You are a senior VC partner with deep expertise in company analysis and investment evaluation. Your analysis is always thorough, evidence-based, and strategic."
+
+# Static part of the generate_swot prompt. It is sent first and is byte-identical on every call, and together
+# with the system message it is over 1024 tokens, so OpenAI's automatic prompt caching can reuse it.
+SWOT_INSTRUCTIONS = """You are a senior partner at a top-tier venture capital firm with 20+ years of experience evaluating companies.
+You are preparing an investment memo that will be presented to sophisticated investors, LPs, and board members.
+
+Your analysis must be:
+- Deeply analytical with specific evidence and reasoning
+- Nuanced, avoiding generic statements
+- Focused on strategic implications and competitive positioning
+- Forward-looking with clear risk assessment
+- Professional and investment-grade quality
+
+Return valid JSON with the following structure:
+{
+    "executive_summary": "A 3-4 sentence executive summary that captures the investment thesis, key value drivers, and primary risks",
+    "risk_rating": "One of: LOW, MEDIUM, or HIGH - based on your overall assessment of investment risk",
+    "investment_verdict": "One of: BUY, HOLD, SELL, or WATCH - your recommendation for investors",
+    "strengths": [
+        "Each strength should be specific, evidence-based, and explain WHY it matters strategically (3-5 items)"
+    ],
+    "weaknesses": [
+        "Each weakness should be specific and explain the strategic implications (3-5 items)"
+    ],
+    "opportunities": [
+        "Each opportunity should be specific, addressable, and explain the potential impact (3-5 items)"
+    ],
+    "threats": [
+        "Each threat should be specific and explain the potential impact on the business (3-5 items)"
+    ],
+    "market_analysis": "2-3 sentences on the company's market position, competitive landscape, and market dynamics",
+    "strategic_recommendations": [
+        "3-4 specific, actionable strategic recommendations based on your analysis"
+    ],
+    "investment_considerations": "2-3 sentences on key factors an investor should consider (valuation, timing, risk profile, etc.)"
+}
+
+IMPORTANT:
+- Be specific and evidence-based. Cite specific products, metrics, or news when possible.
+- Each SWOT item should be 1-2 sentences with clear strategic implications.
+- Your risk_rating and investment_verdict should be consistent with your analysis.
+- For public companies, factor in the financial metrics provided.
+
+HOW TO USE THE MATERIAL:
+- You will receive the company name, live market data (or a note that the company is private), a summary of recent web search results, and cleaned text from the company's website.
+- Treat the market data as accurate as of today. Treat search results as recent but possibly incomplete, and the website as the company's own marketing claims, which need to be weighed rather than repeated.
+- Use only that material plus widely known public facts about the company and its market. Do not invent revenue figures, growth rates, customers, funding rounds, partnerships, or quotes.
+- If the material does not support a claim, leave it out. If two sources disagree, prefer the market data, then the news, then the website.
+- If the material is thin (for example the website could not be scraped), still return every key, keep the lists at the short end of their ranges, and say in the executive_summary that the analysis rests on limited information.
+
+FIELD GUIDANCE:
+- executive_summary: open with what the company does and for whom, then state the investment thesis, the two or three value drivers that matter most, and the single largest risk. Avoid marketing language.
+- strengths: durable advantages such as network effects, switching costs, brand, distribution, proprietary data or technology, cost position, balance sheet strength, or management track record. Tie each one to how it protects margins or growth.
+- weaknesses: internal shortcomings the company controls, such as customer or supplier concentration, thin margins, heavy cash burn, product gaps, execution problems, governance issues, or dependence on a single product line.
+- opportunities: external openings the company is positioned to capture, such as new segments, geographies, pricing power, adjacent products, regulatory tailwinds, or industry consolidation. Say roughly how large or near-term each one is when the material allows.
+- threats: external forces that could hurt the business, such as competitors, substitutes, regulation, macroeconomic cycles, interest rates, currency moves, supply chain risk, or technology shifts. Do not restate weaknesses as threats.
+- market_analysis: describe the market the company competes in, its position relative to the main competitors, and the direction the market is moving.
+- strategic_recommendations: concrete actions management could take in the next 12-24 months, each tied to a strength to exploit, a weakness to fix, an opportunity to capture, or a threat to hedge.
+- investment_considerations: what an investor should weigh before acting, including valuation versus growth, timing and catalysts, liquidity, and how the risk profile fits different mandates.
+
+RATING RUBRIC:
+- risk_rating LOW: established business with diversified revenue, consistent profitability or a clear path to it, a strong balance sheet, and limited exposure to any single threat.
+- risk_rating MEDIUM: solid business with one or two material uncertainties, such as a competitive shift, a margin question, customer concentration, or a pending regulatory change.
+- risk_rating HIGH: unproven or deteriorating business model, heavy cash burn, a severe competitive or regulatory threat, or so little information that the thesis cannot be tested.
+- investment_verdict BUY: the strengths and opportunities clearly outweigh the risks at the current valuation. HOLD: fairly valued, with balanced upside and downside. SELL: the risks or the valuation clearly outweigh the upside. WATCH: promising, but the evidence is not yet strong enough to act, which is also the usual verdict for private companies.
+- Public companies: consider the P/E ratio relative to growth and the sector, the 1-year return and where the price sits within the 52-week range, beta as a measure of volatility, and profit margin as a measure of business quality.
+- Private companies: focus on product, market, traction signals in the news, and competitive position, and do not speculate about valuation numbers.
+
+STYLE:
+- Write in plain, direct English for readers who know investing but do not know this company.
+- Lead each list item with the point itself, not with filler such as "The company has" or "There is".
+- Do not repeat the same point across sections; every item should add new information.
+- Do not use markdown, emojis, or bullet characters inside the JSON strings.
+- Return only the JSON object, with no commentary before or after it."""
 
-# Initialize clients
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
-firecrawl_app = Firecrawl(api_key=FIRECRAWL_API_KEY)
 
 
 # Helper Functions for Stock Data
 
+# Bundled name -> ticker table for well-known companies ('PRIVATE' marks well-known private ones)
+TICKERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tickers.csv')
+
+
+def normalize_company_name(name):
+    """Lower-case a company name and drop everything but letters and digits ('Coca-Cola' -> 'cocacola')."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+@st.cache_resource
+def load_ticker_table():
+    """Load tickers.csv into a read-only {normalized name: ticker} mapping once per process (empty if the file is missing)."""
+    if not os.path.exists(TICKERS_CSV):
+        return MappingProxyType({})
+    with open(TICKERS_CSV, newline='', encoding='utf-8') as f:
+        # Shared by every session, so it is never written to; LLM answers live in the on-disk cache with a TTL
+        return MappingProxyType({normalize_company_name(row['name']): row['ticker'] for row in csv.DictReader(f)})
+
+
 def get_ticker_symbol(company_name):
     """Use GPT to determine if company is publicly traded and return ticker symbol with exchange suffix."""
+    # Well-known names resolve from the bundled table; only ask the LLM on a miss
+    name_key = normalize_company_name(company_name)
+    ticker_table = load_ticker_table()
+    if name_key in ticker_table:
+        result = ticker_table[name_key]
+        return None if result == "PRIVATE" else result
+
     prompt = f"""Determine if "{company_name}" is a publicly traded company.
 
 If it IS publicly traded, return the stock ticker symbol with the appropriate Yahoo Finance suffix for the PRIMARY exchange where it trades:
@@ -50,7 +186,10 @@ If it is NOT publicly traded (private company), return "PRIVATE".
 
 Return ONLY the ticker symbol (with suffix if needed) or "PRIVATE", nothing else."""
 
-    response = openai_client.chat.completions.create(
+    # Deterministic (temperature=0), so repeat lookups are served from the on-disk cache
+    content = cached_chat_completion(
+        openai_client,
+        ttl=TICKER_CACHE_TTL,
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a financial expert. Return only the ticker symbol with appropriate exchange suffix, or PRIVATE."},
@@ -59,10 +198,78 @@ Return ONLY the ticker symbol (with suffix if needed) or "PRIVATE", nothing else
         temperature=0
     )
 
-    result = response.choices[0].message.content.strip().upper()
+    result = content.strip().upper()
     return None if result == "PRIVATE" else result
 
 
+# Map Yahoo exchange codes to friendly names
+EXCHANGE_NAMES = MappingProxyType({
+    "NMS": "NASDAQ",
+    "NYQ": "NYSE",
+    "NGM": "NASDAQ",
+    "TOR": "TSX",
+    "TSX": "TSX",
+    "VAN": "TSX-V",
+    "LSE": "LSE",
+    "LON": "LSE",
+    "FRA": "Frankfurt",
+    "PAR": "Euronext Paris",
+    "HKG": "HKEX",
+    "JPX": "Tokyo",
+    "TYO": "Tokyo",
+    "ASX": "ASX",
+})
+
+# Currency symbols (use $ for USD and CAD since users know TSX is in CAD)
+CURRENCY_SYMBOLS = MappingProxyType({
+    "USD": "$",
+    "CAD": "$",
+    "GBP": "£",
+    "EUR": "€",
+    "JPY": "¥",
+    "HKD": "HK$",
+    "AUD": "A$",
+    "CHF": "CHF ",
+})
+
+# Shared pool for overlapping the separate Yahoo requests of a stock lookup
+# (yfinance already reuses one HTTP session across Ticker objects)
+@st.cache_resource
+def get_yf_executor():
+    """Return the process-wide thread pool for Yahoo requests."""
+    return ThreadPoolExecutor(max_workers=8)
+
+
+YF_EXECUTOR = get_yf_executor()
+
+# Fields read from the full info payload, which is fetched anyway; only the price and 1-year change come from
+# fast_info, whose other fields (e.g. marketCap) can cost extra Yahoo requests
+_INFO_KEYS = (
+    "trailingPE", "forwardPE", "sector", "industry", "fullTimeEmployees",
+    "trailingAnnualDividendYield", "dividendYield", "beta", "totalRevenue",
+    "profitMargins", "regularMarketTime", "marketCap", "currency", "exchange",
+    "fiftyTwoWeekHigh", "fiftyTwoWeekLow",
+)
+
+
+# Cached with st.cache_data so it survives reruns (Streamlit re-executes this script on every interaction)
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_full_info(ticker):
+    """Fetch the full yfinance info dict (slow, several requests) once per ticker per hour."""
+    info = yf.Ticker(ticker).get_info()
+    # A near-empty payload means Yahoo throttled us; raise so it is retried and not cached
+    if not info or len(info) < 5:
+        raise RuntimeError(f"Too many requests: incomplete info for {ticker}")
+    return info
+
+
+# Chart data, cached separately from fetch_stock_data so memo re-renders don't hit Yahoo again
+@st.cache_data(ttl=900, show_spinner=False)
+def fetch_history(ticker):
+    """Return one year of daily closes for ticker as a one-column ('Close') DataFrame."""
+    return yf.Ticker(ticker).history(period="1y", actions=False)[['Close']]
+
+
 def fetch_stock_data(ticker):
     """Use yfinance to fetch stock data for a given ticker with retry logic for rate limiting."""
     max_retries = 3
@@ -76,9 +283,17 @@ def fetch_stock_data(ticker):
             
             stock = yf.Ticker(ticker)
             
+            # Start the full-info request now so it runs alongside the fast_info lookup
+            info_future = YF_EXECUTOR.submit(get_full_info, ticker)
+            
             # Try to get info with timeout handling
             try:
-                info = stock.info
+                # fast_info's lastPrice comes from a single 1-year price history request
+                fast_info = stock.fast_info
+                current_price = fast_info['lastPrice']
+                # Everything else (market cap, 52-week range, P/E, sector, ...) comes from the full info payload, cached per ticker
+                info = info_future.result()
+                vals = {k: info.get(k) for k in _INFO_KEYS}
             except Exception as info_error:
                 error_msg = str(info_error).lower()
                 if "rate limit" in error_msg or "too many requests" in error_msg or "429" in str(info_error):
@@ -88,97 +303,83 @@ def fetch_stock_data(ticker):
                         return None  # Give up after max retries
                 raise  # Re-raise if it's a different error
             
-            # Check if we got rate limited (info will be empty or minimal)
-            if not info or len(info) < 5:
+            # Check if we got rate limited (no price)
+            if current_price is None:
                 if attempt < max_retries - 1:
                     time.sleep(retry_delay * (attempt + 1))
                     continue
                 else:
                     return None
 
-            # Get historical data for 1-year return calculation
+            # 1-year return: lastPrice above already loaded a year of daily prices, and yearChange
+            # is computed from that same series, so no second history request is needed
             try:
-                hist = stock.history(period="1y")
-            except Exception as hist_error:
-                error_msg = str(hist_error).lower()
-                if "rate limit" in error_msg or "too many requests" in error_msg or "429" in str(hist_error):
-                    if attempt < max_retries - 1:
-                        continue  # Retry
-                    else:
-                        # Continue without historical data
-                        hist = pd.DataFrame()
-                else:
-                    hist = pd.DataFrame()  # Continue without historical data
-            
-            year_return = None
-            if len(hist) >= 2:
-                start_price = hist['Close'].iloc[0]
-                end_price = hist['Close'].iloc[-1]
-                year_return = ((end_price - start_price) / start_price) * 100
+                year_change = fast_info['yearChange']
+            except Exception:
+                year_change = None  # Continue without the 1-year return
+            year_return = year_change * 100 if year_change is not None else None
 
             # Get last trade time
             last_trade_time = None
-            market_time = info.get("regularMarketTime")
+            market_time = vals["regularMarketTime"]
             if market_time:
                 last_trade_time = datetime.fromtimestamp(market_time).strftime("%b %d, %I:%M %p")
 
             # Get exchange and currency info
-            exchange = info.get("exchange", "")
-            currency = info.get("currency", "USD")
-
-            # Map exchange codes to friendly names
-            exchange_names = {
-                "NMS": "NASDAQ",
-                "NYQ": "NYSE",
-                "NGM": "NASDAQ",
-                "TOR": "TSX",
-                "TSX": "TSX",
-                "VAN": "TSX-V",
-                "LSE": "LSE",
-                "LON": "LSE",
-                "FRA": "Frankfurt",
-                "PAR": "Euronext Paris",
-                "HKG": "HKEX",
-                "JPX": "Tokyo",
-                "TYO": "Tokyo",
-                "ASX": "ASX",
-            }
-            exchange_display = exchange_names.get(exchange, exchange)
-
-            # Currency symbols (use $ for USD and CAD since users know TSX is in CAD)
-            currency_symbols = {
-                "USD": "$",
-                "CAD": "$",
-                "GBP": "£",
-                "EUR": "€",
-                "JPY": "¥",
-                "HKD": "HK$",
-                "AUD": "A$",
-                "CHF": "CHF ",
-            }
-            currency_symbol = currency_symbols.get(currency, f"{currency} ")
-
-            return {
-                "current_price": info.get("currentPrice") or info.get("regularMarketPrice"),
-                "market_cap": info.get("marketCap"),
+            exchange = vals["exchange"] or ""
+            currency = vals["currency"] or "USD"
+
+            # Friendly exchange name and currency symbol
+            exchange_display = EXCHANGE_NAMES.get(exchange, exchange)
+            currency_symbol = CURRENCY_SYMBOLS.get(currency, f"{currency} ")
+
+            # Newer Yahoo payloads report dividendYield in percent; normalize it to a fraction
+            dividend_yield = vals["dividendYield"]
+            if dividend_yield and dividend_yield > 1:
+                dividend_yield /= 100
+            dividend_yield = vals["trailingAnnualDividendYield"] or dividend_yield
+
+            stock_data = {
+                "current_price": current_price,
+                "market_cap": vals["marketCap"],
                 "year_return": year_return,
-                "pe_ratio": info.get("trailingPE"),
-                "forward_pe": info.get("forwardPE"),
-                "fifty_two_week_high": info.get("fiftyTwoWeekHigh"),
-                "fifty_two_week_low": info.get("fiftyTwoWeekLow"),
-                "sector": info.get("sector"),
-                "industry": info.get("industry"),
-                "employees": info.get("fullTimeEmployees"),
-                "dividend_yield": info.get("trailingAnnualDividendYield") or (info.get("dividendYield") / 100 if info.get("dividendYield") and info.get("dividendYield") > 1 else info.get("dividendYield")),
-                "beta": info.get("beta"),
-                "revenue": info.get("totalRevenue"),
-                "profit_margin": info.get("profitMargins"),
+                "pe_ratio": vals["trailingPE"],
+                "forward_pe": vals["forwardPE"],
+                "fifty_two_week_high": vals["fiftyTwoWeekHigh"],
+                "fifty_two_week_low": vals["fiftyTwoWeekLow"],
+                "sector": vals["sector"],
+                "industry": vals["industry"],
+                "employees": vals["fullTimeEmployees"],
+                "dividend_yield": dividend_yield,
+                "beta": vals["beta"],
+                "revenue": vals["totalRevenue"],
+                "profit_margin": vals["profitMargins"],
                 "ticker": ticker,
                 "last_trade_time": last_trade_time,
                 "exchange": exchange_display,
                 "currency": currency,
                 "currency_symbol": currency_symbol
             }
+
+            # Display strings shared by the UI, the prompt and the PDF, computed once here
+            price = stock_data["current_price"]
+            year_return = stock_data["year_return"]
+            pe_ratio = stock_data["pe_ratio"]
+            low_52 = stock_data["fifty_two_week_low"]
+            high_52 = stock_data["fifty_two_week_high"]
+            # Remove suffix from ticker for cleaner display (e.g., SHOP.TO -> SHOP)
+            ticker_clean = ticker.split('.')[0]
+            stock_data.update({
+                "ticker_clean": ticker_clean,
+                # Format as "Exchange: TICKER" (e.g., "TSX: SHOP")
+                "ticker_info": f"{exchange_display}: {ticker_clean}" if exchange_display else ticker_clean,
+                "price_label": f"{currency_symbol}{price:.2f}" if price else "N/A",
+                "market_cap_label": format_market_cap(stock_data["market_cap"]),
+                "year_return_label": f"{year_return:.1f}%" if year_return else "N/A",
+                "pe_label": f"{pe_ratio:.1f}" if pe_ratio else "N/A",
+                "range_label": f"{currency_symbol}{low_52:.2f} - {currency_symbol}{high_52:.2f}" if low_52 and high_52 else "N/A",
+            })
+            return stock_data
         except Exception as e:
             error_msg = str(e).lower()
             # Check if it's a rate limit error
@@ -222,59 +423,88 @@ def format_number(value, prefix="", suffix="", decimals=2):
 
 # Copy logic from analyst.py - Workflow Functions
 
+# Search results and scrapes are stable for hours; only cache searches that found a website
+@disk_cache('company_info', SEARCH_CACHE_TTL, key=lambda company_name: company_name.lower(), cache_if=lambda result: result[0])
 def get_company_info(company_name):
-    """Use Tavily to search for company website and return URL + comprehensive summary."""
-    # Search for official website
-    query = f'{company_name} official website home page'
+    """Use Tavily to search for company website and return URL + comprehensive summary + the top 3 full snippets."""
+    # One search covers both the official website and recent news
+    query = f'{company_name} official website recent news 2024 2025'
     search_response = tavily_client.search(
         query=query,
-        max_results=3
+        max_results=8,
+        search_depth="advanced",
+        include_answer=False
     )
     
-    # Extract the top URL
     results = search_response.get('results', [])
     if not results:
-        return None, "No search results found"
-    
-    top_url = results[0].get('url', '')
+        return None, "No search results found", ""
     
-    # Gather additional context: recent news and market information
-    news_query = f'{company_name} recent news 2024 2025'
-    news_response = tavily_client.search(
-        query=news_query,
-        max_results=5
+    # The website is the top result whose domain contains the company name (else the top result);
+    # everything else is news / market context
+    name_key = normalize_company_name(company_name)
+    website_result = next(
+        (result for result in results if name_key and name_key in urlparse(result.get('url', '')).netloc.replace('-', '')),
+        results[0]
     )
+    news_results = [result for result in results if result is not website_result]
+    top_url = website_result.get('url', '')
     
-    # Build comprehensive summary
-    summary = "=== COMPANY WEBSITE SEARCH ===\n"
-    for i, result in enumerate(results[:3], 1):
-        summary += f"Result {i}:\n"
-        summary += f"Title: {result.get('title', 'N/A')}\n"
-        summary += f"URL: {result.get('url', 'N/A')}\n"
-        summary += f"Content: {result.get('content', 'N/A')[:400]}...\n\n"
+    # Build a compact summary: one line per result, trimmed content
+    parts = [
+        "=== COMPANY WEBSITE SEARCH ===\n",
+        f"{website_result.get('title', 'N/A')} ({website_result.get('url', 'N/A')}): {website_result.get('content', 'N/A')[:200]}...\n",
+        "\n=== RECENT NEWS & MARKET CONTEXT ===\n",
+    ]
+    for i, result in enumerate(news_results[:3], 1):
+        parts.append(f"{i}. {result.get('title', 'N/A')} ({result.get('url', 'N/A')}): {result.get('content', 'N/A')[:200]}...\n")
+    summary = "".join(parts)
     
-    summary += "\n=== RECENT NEWS & MARKET CONTEXT ===\n"
-    news_results = news_response.get('results', [])
-    for i, result in enumerate(news_results[:5], 1):
-        summary += f"News {i}:\n"
-        summary += f"Title: {result.get('title', 'N/A')}\n"
-        summary += f"URL: {result.get('url', 'N/A')}\n"
-        summary += f"Content: {result.get('content', 'N/A')[:400]}...\n\n"
+    # The untrimmed top snippets, which can stand in for the scraped website when they're long enough
+    snippets = "\n\n".join(result.get('content', '') for result in results[:3])
     
-    return top_url, summary
+    return top_url, summary, snippets
 
 
+def clean_website_content(text):
+    """Strip markdown links (mostly nav/footer menus), collapse whitespace and cap at the prompt's budget."""
+    text = re.sub(r'\[.*?\]\(.*?\)', '', text)
+    return re.sub(r'\s+', ' ', text).strip()[:WEBSITE_CONTENT_CHARS]
+
+
+# Store the cleaned, capped text so the cache holds exactly what the prompt uses (failed scrapes return "" and aren't cached)
+@disk_cache('website', SCRAPE_CACHE_TTL)
 def analyze_website(url):
-    """Use Firecrawl to scrape the URL (markdown format). Return first 5,000 characters."""
-    try:
-        scrape_result = firecrawl_app.scrape(url, formats=['markdown'])
-        markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
+    """Use Firecrawl to scrape the URL (markdown format). Return it cleaned and capped by clean_website_content."""
+    for attempt in range(FIRECRAWL_MAX_RETRIES):
+        # Exponential backoff between attempts: 2s, 4s, ...
+        delay = 2 * 2 ** attempt
+        try:
+            # Limit concurrent scrapes across all sessions so we don't trip Firecrawl's rate limit
+            with firecrawl_semaphore:
+                # Main content only (no nav/footer) and a hard server-side time limit
+                scrape_result = firecrawl_app.scrape(url, formats=['markdown'], only_main_content=True,
+                                                     timeout=FIRECRAWL_TIMEOUT_MS)
+            markdown_content = scrape_result.markdown if hasattr(scrape_result, 'markdown') else str(scrape_result)
+            
+            # An empty page is usually a throttled scrape, so retry
+            if markdown_content:
+                return clean_website_content(markdown_content)
+        except Exception as e:
+            error_msg = str(e).lower()
+            rate_limited = getattr(e, 'status_code', None) == 429 or "rate limit" in error_msg or "429" in error_msg
+            if not rate_limited or attempt == FIRECRAWL_MAX_RETRIES - 1:
+                st.error(f"Error scraping website: {e}")
+                return ""
+            # Honor the server's Retry-After header when the SDK exposes the response
+            retry_after = getattr(getattr(e, 'response', None), 'headers', {}).get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                delay = int(retry_after)
         
-        # Return the first 5,000 characters (to save tokens)
-        return markdown_content[:5000]
-    except Exception as e:
-        st.error(f"Error scraping website: {e}")
-        return ""
+        if attempt < FIRECRAWL_MAX_RETRIES - 1:
+            time.sleep(delay)
+    
+    return ""
 
 
 def get_competitors(company_name, industry=None):
@@ -289,10 +519,10 @@ def get_competitors(company_name, industry=None):
         max_results=5
     )
 
-    search_context = ""
-    for result in search_response.get('results', []):
-        search_context += f"Title: {result.get('title', '')}\n"
-        search_context += f"Content: {result.get('content', '')[:500]}\n\n"
+    search_context = "".join(
+        f"Title: {result.get('title', '')}\nContent: {result.get('content', '')[:500]}\n\n"
+        for result in search_response.get('results', [])
+    )
 
     prompt = f"""Based on the following search results about {company_name}'s competitors, identify the top 3-5 main competitors.
 
@@ -315,7 +545,8 @@ IMPORTANT:
 - Order by relevance (most direct competitor first)
 - Return 3-5 competitors maximum"""
 
-    response = openai_client.chat.completions.create(
+    content = cached_chat_completion(
+        openai_client,
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a market research analyst. Return only valid JSON."},
@@ -325,7 +556,7 @@ IMPORTANT:
         temperature=0
     )
 
-    result = json.loads(response.choices[0].message.content)
+    result = orjson.loads(content)
     return result.get('competitors', [])
 
 
@@ -430,29 +661,26 @@ Be specific and use the financial data provided. If data is limited, acknowledge
         temperature=0.5
     )
 
-    return json.loads(response.choices[0].message.content)
+    return orjson.loads(response.choices[0].message.content)
 
 
-def generate_swot(company_name, search_summary, website_content, stock_data=None):
-    """Generate sophisticated investment analysis using gpt-4o for deeper insights."""
+def generate_swot(company_name, search_summary, website_content, stock_data=None, on_partial=None):
+    """Generate sophisticated investment analysis using gpt-4o for deeper insights.
+
+    The response is streamed; on_partial(dict) is called with the fields parsed so far as they arrive.
+    """
 
     # Build stock context if available
     stock_context = ""
     if stock_data:
-        curr_sym = stock_data.get('currency_symbol', '$')
-        low_52 = stock_data.get('fifty_two_week_low')
-        high_52 = stock_data.get('fifty_two_week_high')
-        range_str = f"{curr_sym}{low_52:.2f} - {curr_sym}{high_52:.2f}" if low_52 and high_52 else "N/A"
-        price = stock_data.get('current_price')
-        price_str = f"{curr_sym}{price:.2f}" if price else "N/A"
         stock_context = f"""
 FINANCIAL METRICS (Live Market Data):
 - Stock Ticker: {stock_data.get('ticker', 'N/A')}
-- Current Price: {price_str}
-- Market Cap: {format_market_cap(stock_data.get('market_cap'))}
-- 1-Year Return: {format_number(stock_data.get('year_return'), suffix='%') if stock_data.get('year_return') else 'N/A'}
-- P/E Ratio: {format_number(stock_data.get('pe_ratio'), decimals=1) if stock_data.get('pe_ratio') else 'N/A'}
-- 52-Week Range: {range_str}
+- Current Price: {stock_data['price_label']}
+- Market Cap: {stock_data['market_cap_label']}
+- 1-Year Return: {stock_data['year_return_label']}
+- P/E Ratio: {stock_data['pe_label']}
+- 52-Week Range: {stock_data['range_label']}
 - Sector: {stock_data.get('sector', 'N/A')}
 - Industry: {stock_data.get('industry', 'N/A')}
 - Employees: {f"{stock_data.get('employees'):,}" if stock_data.get('employees') else 'N/A'}
@@ -461,66 +689,68 @@ FINANCIAL METRICS (Live Market Data):
     else:
         stock_context = "\nNote: This is a PRIVATE company - no public stock data available.\n"
 
-    prompt = f"""You are a senior partner at a top-tier venture capital firm with 20+ years of experience evaluating companies.
-You are preparing an investment memo for {company_name} that will be presented to sophisticated investors, LPs, and board members.
-
-Your analysis must be:
-- Deeply analytical with specific evidence and reasoning
-- Nuanced, avoiding generic statements
-- Focused on strategic implications and competitive positioning
-- Forward-looking with clear risk assessment
-- Professional and investment-grade quality
+    # Static instructions first and company-specific data last, so OpenAI can reuse the cached prompt prefix
+    prompt = f"""{SWOT_INSTRUCTIONS}
 
 Based on the following information, provide a comprehensive investment analysis.
+
+COMPANY: {company_name}
 {stock_context}
 SEARCH CONTEXT & MARKET DATA:
 {search_summary}
 
 WEBSITE CONTENT:
-{website_content[:4000]}
-
-Return valid JSON with the following structure:
-{{
-    "executive_summary": "A 3-4 sentence executive summary that captures the investment thesis, key value drivers, and primary risks",
-    "risk_rating": "One of: LOW, MEDIUM, or HIGH - based on your overall assessment of investment risk",
-    "investment_verdict": "One of: BUY, HOLD, SELL, or WATCH - your recommendation for investors",
-    "strengths": [
-        "Each strength should be specific, evidence-based, and explain WHY it matters strategically (3-5 items)"
-    ],
-    "weaknesses": [
-        "Each weakness should be specific and explain the strategic implications (3-5 items)"
-    ],
-    "opportunities": [
-        "Each opportunity should be specific, addressable, and explain the potential impact (3-5 items)"
-    ],
-    "threats": [
-        "Each threat should be specific and explain the potential impact on the business (3-5 items)"
-    ],
-    "market_analysis": "2-3 sentences on the company's market position, competitive landscape, and market dynamics",
-    "strategic_recommendations": [
-        "3-4 specific, actionable strategic recommendations based on your analysis"
-    ],
-    "investment_considerations": "2-3 sentences on key factors an investor should consider (valuation, timing, risk profile, etc.)"
-}}
-
-IMPORTANT:
-- Be specific and evidence-based. Cite specific products, metrics, or news when possible.
-- Each SWOT item should be 1-2 sentences with clear strategic implications.
-- Your risk_rating and investment_verdict should be consistent with your analysis.
-- For public companies, factor in the financial metrics provided."""
-
-    response = openai_client.chat.completions.create(
+{website_content}"""
+
+    # Opt in to caching despite temperature=0.7: re-running the same company within a day reuses the memo.
+    # The key leaves out stock_context, whose live quote moves on nearly every run during market hours.
+    cache_key = {
+        "swot": "gpt-4o",
+        "system": SWOT_SYSTEM_MESSAGE,
+        "instructions": SWOT_INSTRUCTIONS,
+        "company": company_name,
+        "ticker": stock_data.get('ticker') if stock_data else None,
+        "search_summary": hashlib.sha256(search_summary.encode('utf-8')).hexdigest(),
+        "website_content": hashlib.sha256(website_content.encode('utf-8')).hexdigest(),
+    }
+    parts = []
+    last_render = 0.0
+    for delta in stream_chat_completion(
+        openai_client,
+        ttl=SWOT_CACHE_TTL,
+        use_cache=True,
+        cache_key=cache_key,
         model="gpt-4o",  # Use gpt-4o for more sophisticated analysis
         messages=[
-            {"role": "system", "content": "You are a senior VC partner with deep expertise in company analysis and investment evaluation. Your analysis is always thorough, evidence-based, and strategic."},
+            {"role": "system", "content": SWOT_SYSTEM_MESSAGE},
             {"role": "user", "content": prompt}
         ],
         response_format={"type": "json_object"},
         temperature=0.7  # Slightly higher for more nuanced analysis
-    )
-    
-    json_response = response.choices[0].message.content
-    return json.loads(json_response)
+    ):
+        parts.append(delta)
+        # Re-parsing the whole buffer on every token is wasteful, so refresh the preview a few times a second
+        if on_partial and time.monotonic() - last_render > 0.25:
+            partial = parse_partial_json("".join(parts))
+            if partial:
+                on_partial(partial)
+                last_render = time.monotonic()
+
+    json_response = "".join(parts)
+    return orjson.loads(json_response)
+
+
+# Typographic characters FPDF's core fonts can't encode, mapped to plain equivalents (applied in one pass)
+_SANITIZE_TABLE = str.maketrans({
+    '\u2022': '-',  # bullet point
+    '\u2013': '-',  # en dash
+    '\u2014': '-',  # em dash
+    '\u2018': "'",  # left single quote
+    '\u2019': "'",  # right single quote
+    '\u201C': '"',  # left double quote
+    '\u201D': '"',  # right double quote
+    '\u2026': '...',  # ellipsis
+})
 
 
 def sanitize_text(text):
@@ -528,213 +758,183 @@ def sanitize_text(text):
     if not text:
         return ""
     text = str(text)
-    replacements = {
-        '\u2022': '-',  # bullet point
-        '\u2013': '-',  # en dash
-        '\u2014': '-',  # em dash
-        '\u2018': "'",  # left single quote
-        '\u2019': "'",  # right single quote
-        '\u201C': '"',  # left double quote
-        '\u201D': '"',  # right double quote
-        '\u2026': '...',  # ellipsis
-    }
-    result = text
-    for unicode_char, replacement in replacements.items():
-        result = result.replace(unicode_char, replacement)
-    try:
-        return result.encode('latin-1', errors='replace').decode('latin-1')
-    except:
-        return ''.join(c if ord(c) < 256 else '?' for c in result)
+    # Most model output is plain ASCII, which the core fonts encode as-is
+    if text.isascii():
+        return text
+    # Anything else outside latin-1 becomes '?'
+    return text.translate(_SANITIZE_TABLE).encode('latin-1', errors='replace').decode('latin-1')
+
+
+# Bundled Unicode font for the PDF (FPDF's core fonts such as Arial are latin-1 only)
+UNICODE_FONT = "DejaVu"
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+# No oblique face is bundled, so italic text uses the regular face
+FONT_FILES = {"": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf", "I": "DejaVuSans.ttf"}
+
 
+def add_unicode_font(pdf):
+    """Register the bundled DejaVu font with pdf. Return False if the font files are missing."""
+    paths = {style: os.path.join(FONT_DIR, filename) for style, filename in FONT_FILES.items()}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return False
+    for style, path in paths.items():
+        pdf.add_font(UNICODE_FONT, style, path)
+    return True
 
-def save_pdf(company_name, swot_data, stock_data=None, competitive_analysis=None, competitors_data=None):
-    """Use FPDF to create a clean PDF with SWOT analysis, financial metrics, and competitive analysis."""
+
+def plain_text(text):
+    """Return text as a string unchanged (the Unicode font can render it as-is)."""
+    return str(text) if text else ""
+
+
+# Default PDF section header color
+DARK_BLUE = (0, 51, 102)
+
+# SWOT sections in the PDF: (swot_data key, header, header color)
+SWOT_SECTIONS = [
+    ("strengths", "Strengths", (34, 139, 34)),  # Forest green
+    ("weaknesses", "Weaknesses", (178, 34, 34)),  # Firebrick red
+    ("opportunities", "Opportunities", (30, 144, 255)),  # Dodger blue
+    ("threats", "Threats", (255, 140, 0)),  # Dark orange
+]
+
+
+# Bullet-list fields of a memo, shown both on the page and in the PDF
+SWOT_LIST_KEYS = ('strengths', 'weaknesses', 'opportunities', 'threats', 'strategic_recommendations')
+COMPETITIVE_LIST_KEYS = ('competitive_advantages', 'competitive_disadvantages', 'key_differentiators')
+
+
+def prepare_bullets(swot_data, competitive_analysis=None):
+    """Collect every bullet list of a memo once, as non-empty strings keyed by field name."""
+    competitive_analysis = competitive_analysis or {}
+    lists = {key: swot_data.get(key) for key in SWOT_LIST_KEYS}
+    lists.update({key: competitive_analysis.get(key) for key in COMPETITIVE_LIST_KEYS})
+    return {key: [str(item) for item in items or [] if str(item).strip()] for key, items in lists.items()}
+
+
+def _render_section(pdf, font, title, payload, effective_width, size=14, rgb=DARK_BLUE, space_after=5):
+    """Render a colored header and its body: one paragraph (str) or already-cleaned bullet lines (list).
+
+    Sections with no content are skipped.
+    """
+    if not payload:
+        return
+    pdf.set_font(font, "B", size)
+    pdf.set_text_color(*rgb)
+    pdf.set_x(pdf.l_margin)
+    pdf.cell(effective_width, 10 if size >= 14 else 8, title, new_x="LMARGIN", new_y="NEXT")
+    pdf.set_text_color(0, 0, 0)  # Reset to black
+    pdf.set_font(font, "", 11)
+    for line in [payload] if isinstance(payload, str) else payload:
+        pdf.set_x(pdf.l_margin)
+        pdf.multi_cell(effective_width, 6, line)
+    if space_after:
+        pdf.ln(space_after)
+
+
+def build_pdf_bytes(company_name, swot_data, stock_data=None, competitive_analysis=None, competitors_data=None, bullets=None):
+    """Use FPDF to create a clean PDF with SWOT analysis, financial metrics, and competitive analysis. Return its bytes.
+
+    bullets is prepare_bullets' output, if the caller already has it.
+    """
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
     pdf.add_page()
 
+    # With the bundled Unicode font, curly quotes, dashes and non-Latin names render as-is;
+    # otherwise fall back to Arial and sanitize_text
+    if add_unicode_font(pdf):
+        font, clean = UNICODE_FONT, plain_text
+    else:
+        font, clean = "Arial", sanitize_text
+
+    # Clean every text field and bullet list once up front, so the layout below is only FPDF calls
+    competitive_analysis = competitive_analysis or {}
+    if bullets is None:
+        bullets = prepare_bullets(swot_data, competitive_analysis)
+    bullets = {key: [clean(f"- {item}") for item in items] for key, items in bullets.items()}
+    text = {
+        'executive_summary': clean(swot_data.get('executive_summary', swot_data.get('summary', 'No summary available.'))),
+        'market_analysis': clean(swot_data.get('market_analysis', '')),
+        'investment_considerations': clean(swot_data.get('investment_considerations', '')),
+        'competitive_position': clean(competitive_analysis.get('competitive_position', '')),
+        'valuation_comparison': clean(competitive_analysis.get('valuation_comparison', '')),
+        'competitive_outlook': clean(competitive_analysis.get('competitive_outlook', '')),
+    }
+
     effective_width = pdf.w - 2 * pdf.l_margin
 
     # Format company name with title case
     display_name = company_name.title()
 
     # Title with exchange:ticker for public companies
-    pdf.set_font("Arial", "B", 20)
+    pdf.set_font(font, "B", 20)
     if stock_data and stock_data.get('ticker'):
-        exchange = stock_data.get('exchange', '')
-        ticker_display = stock_data.get('ticker', '')
-        ticker_clean = ticker_display.split('.')[0] if '.' in ticker_display else ticker_display
-        ticker_info = f"{exchange}: {ticker_clean}" if exchange else ticker_clean
-        pdf.cell(effective_width, 10, sanitize_text(f"Investment Memo: {display_name} ({ticker_info})"), new_x="LMARGIN", new_y="NEXT", align="C")
+        pdf.cell(effective_width, 10, clean(f"Investment Memo: {display_name} ({stock_data['ticker_info']})"), new_x="LMARGIN", new_y="NEXT", align="C")
     else:
-        pdf.cell(effective_width, 10, sanitize_text(f"Investment Memo: {display_name}"), new_x="LMARGIN", new_y="NEXT", align="C")
+        pdf.cell(effective_width, 10, clean(f"Investment Memo: {display_name}"), new_x="LMARGIN", new_y="NEXT", align="C")
 
     # Generation date
-    pdf.set_font("Arial", "I", 10)
+    pdf.set_font(font, "I", 10)
     pdf.cell(effective_width, 6, f"Generated: {datetime.now().strftime('%B %d, %Y')}", new_x="LMARGIN", new_y="NEXT", align="C")
     pdf.ln(8)
 
     # Investment Verdict & Risk Rating
     risk_rating = swot_data.get('risk_rating', 'N/A')
     investment_verdict = swot_data.get('investment_verdict', 'N/A')
-    pdf.set_font("Arial", "B", 12)
-    pdf.cell(effective_width, 8, sanitize_text(f"Investment Verdict: {investment_verdict}  |  Risk Rating: {risk_rating}"), new_x="LMARGIN", new_y="NEXT", align="C")
+    pdf.set_font(font, "B", 12)
+    pdf.cell(effective_width, 8, clean(f"Investment Verdict: {investment_verdict}  |  Risk Rating: {risk_rating}"), new_x="LMARGIN", new_y="NEXT", align="C")
     pdf.ln(5)
 
     # Financial Metrics Section (for public companies)
     if stock_data and stock_data.get('current_price'):
-        pdf.set_font("Arial", "B", 14)
-        pdf.set_text_color(0, 51, 102)  # Dark blue
-        pdf.cell(effective_width, 10, "Financial Metrics", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0)  # Reset to black
-        pdf.set_font("Arial", "", 11)
-
-        # Get currency symbol
-        curr_sym = stock_data.get('currency_symbol', '$')
-
-        # Create a metrics summary line
-        exchange = stock_data.get('exchange', '')
-        ticker_display = stock_data.get('ticker', '')
-        ticker_clean = ticker_display.split('.')[0] if '.' in ticker_display else ticker_display
-        ticker_info = f"{exchange}: {ticker_clean}" if exchange else ticker_clean
-        metrics_line1 = f"Ticker: {ticker_info}  |  Price: {curr_sym}{stock_data.get('current_price', 'N/A'):.2f}  |  Market Cap: {format_market_cap(stock_data.get('market_cap'))}"
-        pdf.set_x(pdf.l_margin)
-        pdf.multi_cell(effective_width, 6, sanitize_text(metrics_line1))
-
-        year_return = stock_data.get('year_return')
-        pe_ratio = stock_data.get('pe_ratio')
-        metrics_line2 = f"1-Year Return: {year_return:.1f}%" if year_return else "1-Year Return: N/A"
-        metrics_line2 += f"  |  P/E Ratio: {pe_ratio:.1f}" if pe_ratio else "  |  P/E Ratio: N/A"
-        metrics_line2 += f"  |  Sector: {stock_data.get('sector', 'N/A')}"
-        pdf.set_x(pdf.l_margin)
-        pdf.multi_cell(effective_width, 6, sanitize_text(metrics_line2))
-
-        low_52 = stock_data.get('fifty_two_week_low')
-        high_52 = stock_data.get('fifty_two_week_high')
+        # Create the metrics summary lines
+        metrics = [
+            f"Ticker: {stock_data['ticker_info']}  |  Price: {stock_data['price_label']}  |  Market Cap: {stock_data['market_cap_label']}",
+            f"1-Year Return: {stock_data['year_return_label']}  |  P/E Ratio: {stock_data['pe_label']}  |  Sector: {stock_data.get('sector', 'N/A')}",
+        ]
         div_yield = stock_data.get('dividend_yield')
-        if low_52 and high_52:
-            metrics_line3 = f"52-Week Range: {curr_sym}{low_52:.2f} - {curr_sym}{high_52:.2f}  |  Industry: {stock_data.get('industry', 'N/A')}"
+        if stock_data['range_label'] != "N/A":
+            metrics_line3 = f"52-Week Range: {stock_data['range_label']}  |  Industry: {stock_data.get('industry', 'N/A')}"
             if div_yield:
                 metrics_line3 += f"  |  Dividend Yield: {div_yield*100:.2f}%"
-            pdf.set_x(pdf.l_margin)
-            pdf.multi_cell(effective_width, 6, sanitize_text(metrics_line3))
-        pdf.ln(5)
+            metrics.append(metrics_line3)
+        _render_section(pdf, font, "Financial Metrics", [clean(line) for line in metrics], effective_width)
     else:
         # Private company indicator
-        pdf.set_font("Arial", "I", 11)
+        pdf.set_font(font, "I", 11)
         pdf.cell(effective_width, 8, "Private Company - No public stock data available", new_x="LMARGIN", new_y="NEXT", align="C")
         pdf.ln(5)
 
-    # Executive Summary
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_text_color(0, 51, 102)  # Dark blue
-    pdf.cell(effective_width, 10, "Executive Summary", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)  # Reset to black
-    pdf.set_font("Arial", "", 11)
-    pdf.set_x(pdf.l_margin)
-    executive_summary = swot_data.get('executive_summary', swot_data.get('summary', 'No summary available.'))
-    pdf.multi_cell(effective_width, 6, sanitize_text(executive_summary))
-    pdf.ln(5)
-
-    # Market Analysis
-    market_analysis = swot_data.get('market_analysis', '')
-    if market_analysis:
-        pdf.set_font("Arial", "B", 14)
-        pdf.set_text_color(0, 51, 102)  # Dark blue
-        pdf.set_x(pdf.l_margin)
-        pdf.cell(effective_width, 10, "Market Analysis", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0)  # Reset to black
-        pdf.set_font("Arial", "", 11)
-        pdf.set_x(pdf.l_margin)
-        pdf.multi_cell(effective_width, 6, sanitize_text(market_analysis))
-        pdf.ln(5)
-    
-    # Strengths (Green header)
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_text_color(34, 139, 34)  # Forest green
-    pdf.set_x(pdf.l_margin)
-    pdf.cell(effective_width, 10, "Strengths", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", "", 11)
-    for strength in swot_data.get('strengths', []):
-        pdf.set_x(pdf.l_margin)
-        sanitized_strength = sanitize_text(f"- {strength}")
-        if sanitized_strength.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_strength)
-    pdf.ln(5)
-
-    # Weaknesses (Red header)
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_text_color(178, 34, 34)  # Firebrick red
-    pdf.set_x(pdf.l_margin)
-    pdf.cell(effective_width, 10, "Weaknesses", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", "", 11)
-    for weakness in swot_data.get('weaknesses', []):
-        pdf.set_x(pdf.l_margin)
-        sanitized_weakness = sanitize_text(f"- {weakness}")
-        if sanitized_weakness.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_weakness)
-    pdf.ln(5)
-
-    # Opportunities (Blue header)
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_text_color(30, 144, 255)  # Dodger blue
-    pdf.set_x(pdf.l_margin)
-    pdf.cell(effective_width, 10, "Opportunities", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", "", 11)
-    for opportunity in swot_data.get('opportunities', []):
-        pdf.set_x(pdf.l_margin)
-        sanitized_opportunity = sanitize_text(f"- {opportunity}")
-        if sanitized_opportunity.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_opportunity)
-    pdf.ln(5)
-
-    # Threats (Orange header)
-    pdf.set_font("Arial", "B", 14)
-    pdf.set_text_color(255, 140, 0)  # Dark orange
-    pdf.set_x(pdf.l_margin)
-    pdf.cell(effective_width, 10, "Threats", new_x="LMARGIN", new_y="NEXT")
-    pdf.set_text_color(0, 0, 0)
-    pdf.set_font("Arial", "", 11)
-    for threat in swot_data.get('threats', []):
-        pdf.set_x(pdf.l_margin)
-        sanitized_threat = sanitize_text(f"- {threat}")
-        if sanitized_threat.strip():
-            pdf.multi_cell(effective_width, 6, sanitized_threat)
-    pdf.ln(5)
+    # Executive Summary, Market Analysis, then Strengths, Weaknesses, Opportunities, Threats
+    overview = [("Executive Summary", text['executive_summary'], DARK_BLUE),
+                ("Market Analysis", text['market_analysis'], DARK_BLUE)]
+    overview += [(title, bullets[key], rgb) for key, title, rgb in SWOT_SECTIONS]
+    for title, payload, rgb in overview:
+        _render_section(pdf, font, title, payload, effective_width, rgb=rgb)
 
     # Competitive Analysis Section
     if competitive_analysis:
         pdf.add_page()  # Start competitive analysis on new page
-        pdf.set_font("Arial", "B", 16)
+        pdf.set_font(font, "B", 16)
         pdf.set_text_color(128, 0, 128)  # Purple
         pdf.cell(effective_width, 10, "Competitive Analysis", new_x="LMARGIN", new_y="NEXT")
         pdf.set_text_color(0, 0, 0)
         pdf.ln(3)
 
-        # Competitive Position
-        comp_position = competitive_analysis.get('competitive_position', '')
-        if comp_position:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Competitive Position", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_font("Arial", "", 11)
-            pdf.set_x(pdf.l_margin)
-            pdf.multi_cell(effective_width, 6, sanitize_text(comp_position))
-            pdf.ln(3)
+        _render_section(pdf, font, "Competitive Position", text['competitive_position'], effective_width,
+                        size=12, rgb=(0, 0, 0), space_after=3)
 
         # Competitor Table
         if competitors_data:
-            pdf.set_font("Arial", "B", 12)
+            pdf.set_font(font, "B", 12)
             pdf.set_x(pdf.l_margin)
             pdf.cell(effective_width, 8, "Key Competitors", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_font("Arial", "", 10)
+            pdf.set_font(font, "", 10)
 
             # Table header
             col_widths = [50, 35, 25, 25, 30]
-            pdf.set_font("Arial", "B", 9)
+            pdf.set_font(font, "B", 9)
             pdf.set_x(pdf.l_margin)
             pdf.cell(col_widths[0], 6, "Company", border=1)
             pdf.cell(col_widths[1], 6, "Market Cap", border=1)
@@ -744,21 +944,21 @@ def save_pdf(company_name, swot_data, stock_data=None, competitive_analysis=None
 
             # Add target company row first
             if stock_data:
-                pdf.set_font("Arial", "B", 9)
+                pdf.set_font(font, "B", 9)
                 pdf.set_x(pdf.l_margin)
-                target_name = sanitize_text(f"{company_name[:15]}..." if len(company_name) > 15 else company_name)
+                target_name = clean(f"{company_name[:15]}..." if len(company_name) > 15 else company_name)
                 pdf.cell(col_widths[0], 6, target_name, border=1)
-                pdf.set_font("Arial", "", 9)
-                pdf.cell(col_widths[1], 6, format_market_cap(stock_data.get('market_cap')) if stock_data.get('market_cap') else "Private", border=1)
-                pdf.cell(col_widths[2], 6, f"{stock_data.get('pe_ratio'):.1f}" if stock_data.get('pe_ratio') else "N/A", border=1)
-                pdf.cell(col_widths[3], 6, f"{stock_data.get('year_return'):.1f}%" if stock_data.get('year_return') else "N/A", border=1)
+                pdf.set_font(font, "", 9)
+                pdf.cell(col_widths[1], 6, stock_data['market_cap_label'] if stock_data.get('market_cap') else "Private", border=1)
+                pdf.cell(col_widths[2], 6, stock_data['pe_label'], border=1)
+                pdf.cell(col_widths[3], 6, stock_data['year_return_label'], border=1)
                 pdf.cell(col_widths[4], 6, format_market_cap(stock_data.get('revenue')) if stock_data.get('revenue') else "N/A", border=1, new_x="LMARGIN", new_y="NEXT")
 
             # Competitor rows
-            pdf.set_font("Arial", "", 9)
+            pdf.set_font(font, "", 9)
             for comp in competitors_data:
                 pdf.set_x(pdf.l_margin)
-                comp_name = sanitize_text(comp.get('name', 'N/A'))
+                comp_name = clean(comp.get('name', 'N/A'))
                 comp_name_display = f"{comp_name[:15]}..." if len(comp_name) > 15 else comp_name
                 pdf.cell(col_widths[0], 6, comp_name_display, border=1)
                 pdf.cell(col_widths[1], 6, format_market_cap(comp.get('market_cap')) if comp.get('market_cap') else "Private", border=1)
@@ -767,116 +967,425 @@ def save_pdf(company_name, swot_data, stock_data=None, competitive_analysis=None
                 pdf.cell(col_widths[4], 6, format_market_cap(comp.get('revenue')) if comp.get('revenue') else "N/A", border=1, new_x="LMARGIN", new_y="NEXT")
             pdf.ln(5)
 
-        # Competitive Advantages (Green)
-        advantages = competitive_analysis.get('competitive_advantages', [])
-        if advantages:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_text_color(34, 139, 34)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Competitive Advantages", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", "", 11)
-            for adv in advantages:
-                pdf.set_x(pdf.l_margin)
-                sanitized_adv = sanitize_text(f"- {adv}")
-                if sanitized_adv.strip():
-                    pdf.multi_cell(effective_width, 6, sanitized_adv)
-            pdf.ln(3)
-
-        # Competitive Disadvantages (Red)
-        disadvantages = competitive_analysis.get('competitive_disadvantages', [])
-        if disadvantages:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_text_color(178, 34, 34)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Competitive Disadvantages", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", "", 11)
-            for disadv in disadvantages:
-                pdf.set_x(pdf.l_margin)
-                sanitized_disadv = sanitize_text(f"- {disadv}")
-                if sanitized_disadv.strip():
-                    pdf.multi_cell(effective_width, 6, sanitized_disadv)
-            pdf.ln(3)
-
-        # Key Differentiators
-        differentiators = competitive_analysis.get('key_differentiators', [])
-        if differentiators:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_text_color(0, 51, 102)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Key Differentiators", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", "", 11)
-            for diff in differentiators:
-                pdf.set_x(pdf.l_margin)
-                sanitized_diff = sanitize_text(f"- {diff}")
-                if sanitized_diff.strip():
-                    pdf.multi_cell(effective_width, 6, sanitized_diff)
-            pdf.ln(3)
-
-        # Valuation Comparison
-        valuation_comp = competitive_analysis.get('valuation_comparison', '')
-        if valuation_comp:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_text_color(0, 51, 102)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Valuation Comparison", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", "", 11)
-            pdf.set_x(pdf.l_margin)
-            pdf.multi_cell(effective_width, 6, sanitize_text(valuation_comp))
-            pdf.ln(3)
-
-        # Competitive Outlook
-        comp_outlook = competitive_analysis.get('competitive_outlook', '')
-        if comp_outlook:
-            pdf.set_font("Arial", "B", 12)
-            pdf.set_text_color(0, 51, 102)
-            pdf.set_x(pdf.l_margin)
-            pdf.cell(effective_width, 8, "Competitive Outlook", new_x="LMARGIN", new_y="NEXT")
-            pdf.set_text_color(0, 0, 0)
-            pdf.set_font("Arial", "", 11)
-            pdf.set_x(pdf.l_margin)
-            pdf.multi_cell(effective_width, 6, sanitize_text(comp_outlook))
-            pdf.ln(5)
+        # Advantages (green), disadvantages (red), differentiators, valuation and outlook
+        competitive_sections = [
+            ("Competitive Advantages", bullets['competitive_advantages'], (34, 139, 34), 3),
+            ("Competitive Disadvantages", bullets['competitive_disadvantages'], (178, 34, 34), 3),
+            ("Key Differentiators", bullets['key_differentiators'], DARK_BLUE, 3),
+            ("Valuation Comparison", text['valuation_comparison'], DARK_BLUE, 3),
+            ("Competitive Outlook", text['competitive_outlook'], DARK_BLUE, 5),
+        ]
+        for title, payload, rgb, space_after in competitive_sections:
+            _render_section(pdf, font, title, payload, effective_width, size=12, rgb=rgb, space_after=space_after)
+
+    # Strategic Recommendations and Investment Considerations
+    _render_section(pdf, font, "Strategic Recommendations", bullets['strategic_recommendations'], effective_width)
+    _render_section(pdf, font, "Investment Considerations", text['investment_considerations'], effective_width,
+                    space_after=0)
+
+    # Render in memory: no file to write, re-read or clean up, and no clashes between concurrent users
+    return bytes(pdf.output())
+
+
+# SWOT cards on the page: (swot_data key, header, header color), two per row
+SWOT_CARDS = [
+    ("strengths", "✅ Strengths", (40, 167, 69)),
+    ("weaknesses", "⚠️ Weaknesses", (220, 53, 69)),
+    ("opportunities", "🚀 Opportunities", (0, 123, 255)),
+    ("threats", "🛡️ Threats", (255, 193, 7)),
+]
+
+
+def render_bullet_card(title, rgb, items, empty_text):
+    """Show a tinted header followed by one line per item, or empty_text in italics if there are none."""
+    r, g, b = rgb
+    st.markdown(f"""
+    <div style="background-color: rgba({r}, {g}, {b}, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
+        <span style="color: #{r:02x}{g:02x}{b:02x}; font-weight: bold;">{title}</span>
+    </div>
+    """, unsafe_allow_html=True)
+    if items:
+        for item in items:
+            st.markdown(f"• {item}")
+    else:
+        st.markdown(f"*{empty_text}*")
 
-    # Strategic Recommendations
-    strategic_recs = swot_data.get('strategic_recommendations', [])
-    if strategic_recs:
-        pdf.set_font("Arial", "B", 14)
-        pdf.set_text_color(0, 51, 102)  # Dark blue
-        pdf.set_x(pdf.l_margin)
-        pdf.cell(effective_width, 10, "Strategic Recommendations", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Arial", "", 11)
-        for rec in strategic_recs:
-            pdf.set_x(pdf.l_margin)
-            sanitized_rec = sanitize_text(f"- {rec}")
-            if sanitized_rec.strip():
-                pdf.multi_cell(effective_width, 6, sanitized_rec)
-        pdf.ln(5)
 
-    # Investment Considerations
+def render_swot_preview(placeholder, swot_partial):
+    """Show the SWOT fields received so far while generate_swot is still streaming."""
+    blocks = ["#### Analysis preview"]
+    if swot_partial.get('executive_summary'):
+        blocks.append(swot_partial['executive_summary'])
+    for key, title, _ in SWOT_SECTIONS:
+        items = [item for item in swot_partial.get(key) or [] if item]
+        if items:
+            blocks.append(f"**{title}**\n" + "\n".join(f"- {item}" for item in items))
+    placeholder.markdown("\n\n".join(blocks))
+
+
+def run_analysis(company_name, force_refresh=False):
+    """Run steps 1-8 for company_name with live progress and return the result dict.
+
+    Returns None (after showing the error) if the website wasn't found or a step failed.
+    """
+    # Show progress with status spinner
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    swot_preview = st.empty()
+
+    try:
+        # Steps 1-4: the ticker lookup (OpenAI) and the website search (Tavily) don't depend on each
+        # other, so run them together and chain stock data / scraping onto each as soon as it finishes
+        status_text.text('Checking if company is publicly traded and searching for company information...')
+        progress_bar.progress(10)
+        stock_data = None
+        website_content = ""
+        # Worker threads need the script run context so st.warning / st.error calls still render
+        with ThreadPoolExecutor(max_workers=4, initializer=add_script_run_ctx,
+                                initargs=(None, get_script_run_ctx())) as executor:
+            # Step 1: Check if company is publicly traded / Step 3: Get company info
+            ticker_future = executor.submit(get_ticker_symbol, company_name)
+            info_future = executor.submit(get_company_info, company_name, use_cache=not force_refresh)
+            stock_future = None
+            website_future = None
+            pending = {ticker_future, info_future}
+            completed = 0
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    completed += 1
+                    if future is ticker_future:
+                        # Step 2: Fetch stock data if public
+                        ticker = future.result()
+                        if ticker:
+                            status_text.text(f'Fetching stock data for {ticker}...')
+                            stock_future = executor.submit(fetch_stock_data, ticker)
+                            pending.add(stock_future)
+                    elif future is info_future:
+                        # Step 4: Analyze website
+                        url, search_summary, snippets = future.result()
+                        if url and len(snippets) >= SKIP_SCRAPE_THRESHOLD:
+                            # The search snippets already carry enough content, so skip the Firecrawl round-trip
+                            website_content = clean_website_content(snippets)
+                        elif url:
+                            status_text.text('Scraping company website...')
+                            website_future = executor.submit(analyze_website, url, use_cache=not force_refresh)
+                            pending.add(website_future)
+                progress_bar.progress(10 + 12 * completed)
+
+            if stock_future:
+                stock_data = stock_future.result()
+            if website_future:
+                website_content = website_future.result()
+
+        if not url:
+            st.error(f'Could not find website for {company_name}')
+            return None
+
+        # Step 5: Generate Analysis with stock context
+        status_text.text('Analyzing data and generating company analysis...')
+        progress_bar.progress(60)
+        swot_data = generate_swot(company_name, search_summary, website_content, stock_data,
+                                  on_partial=lambda partial: render_swot_preview(swot_preview, partial))
+
+        # Step 6: Identify competitors
+        status_text.text('Identifying competitors...')
+        progress_bar.progress(70)
+        industry = stock_data.get('industry') if stock_data else None
+        competitors = get_competitors(company_name, industry)
+
+        # Step 7: Fetch competitor data
+        status_text.text('Fetching competitor data...')
+        progress_bar.progress(80)
+        competitors_data = []
+        for comp in competitors[:4]:  # Limit to 4 competitors
+            comp_data = fetch_competitor_data(comp.get('name', ''))
+            comp_data['reason'] = comp.get('reason', '')
+            competitors_data.append(comp_data)
+
+        # Step 8: Generate competitive analysis
+        status_text.text('Generating competitive analysis...')
+        progress_bar.progress(90)
+        competitive_analysis = generate_competitive_analysis(company_name, stock_data, competitors_data)
+
+        progress_bar.progress(100)
+        status_text.text('Analysis complete!')
+        progress_bar.empty()
+        status_text.empty()
+        swot_preview.empty()
+
+        return {
+            "company": company_name,
+            "swot": swot_data,
+            "stock": stock_data,
+            "competitors": competitors_data,
+            "competitive_analysis": competitive_analysis,
+            # Every bullet list, collected once for both the page and the PDF
+            "bullets": prepare_bullets(swot_data, competitive_analysis),
+            "ts": time.time(),
+        }
+
+    except Exception as e:
+        st.error(f'Error: {str(e)}')
+        progress_bar.empty()
+        status_text.empty()
+        swot_preview.empty()
+        return None
+
+
+# Background thread for building memo PDFs (build_pdf_bytes makes no st.* calls)
+@st.cache_resource
+def get_pdf_executor():
+    """Return the process-wide thread pool for PDF builds."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+PDF_EXECUTOR = get_pdf_executor()
+
+
+def render_memo(result):
+    """Render a stored analysis result and its PDF download button."""
+    company_name = result['company']
+    swot_data = result['swot']
+    stock_data = result['stock']
+    competitors_data = result['competitors']
+    competitive_analysis = result['competitive_analysis']
+    bullets = result['bullets']
+
+    # Build the PDF (once per result) on a worker thread while the page below is drawn
+    pdf_future = None
+    if result.get('pdf') is None:
+        pdf_future = PDF_EXECUTOR.submit(build_pdf_bytes, company_name, swot_data, stock_data, competitive_analysis,
+                                         competitors_data, bullets=bullets)
+
+    # Format company name with title case
+    display_name = company_name.title()
+
+    # Display company name as title (with exchange:ticker for public companies) in styled header
+    if stock_data and stock_data.get('ticker'):
+        st.markdown(f"""
+        <div style="background-color: rgba(128, 128, 128, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px; border: 1px solid rgba(128, 128, 128, 0.2);">
+            <h1 style="margin: 0;">{display_name} <span style="font-weight: normal; font-size: 0.5em; opacity: 0.7;">({stock_data['ticker_info']})</span></h1>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown(f"""
+        <div style="background-color: rgba(128, 128, 128, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px; border: 1px solid rgba(128, 128, 128, 0.2);">
+            <h1 style="margin: 0;">{display_name}</h1>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Display Stock Metrics (for public companies)
+    if stock_data and stock_data.get('current_price'):
+        st.markdown("### Financial Metrics")
+        m1, m2, m3, m4 = st.columns(4)
+        with m1:
+            last_trade = stock_data.get('last_trade_time')
+            st.metric("Stock Price", stock_data['price_label'])
+            if last_trade:
+                st.caption(f"Last updated: {last_trade}")
+        with m2:
+            st.metric("Market Cap", stock_data['market_cap_label'])
+        with m3:
+            yr = stock_data.get('year_return')
+            delta_color = "normal" if yr and yr >= 0 else "inverse"
+            st.metric("1-Year Return", stock_data['year_return_label'],
+                      delta=stock_data['year_return_label'] if yr else None,
+                      delta_color=delta_color if yr else "off")
+        with m4:
+            st.metric("P/E Ratio", stock_data['pe_label'])
+
+        # Expandable Market Details
+        with st.expander("More Market Details"):
+            d1, d2, d3 = st.columns(3)
+            with d1:
+                # Use HTML entity &#36; for $ to avoid LaTeX interpretation
+                range_html = stock_data['range_label'].replace('$', '&#36;')
+                st.markdown(f"<b>52-Week Range:</b> {range_html}", unsafe_allow_html=True)
+                st.markdown(f"<b>Sector:</b> {stock_data.get('sector', 'N/A')}", unsafe_allow_html=True)
+                st.markdown(f"<b>Industry:</b> {stock_data.get('industry', 'N/A')}", unsafe_allow_html=True)
+            with d2:
+                div_yield = stock_data.get('dividend_yield')
+                st.markdown(f"<b>Dividend Yield:</b> {div_yield*100:.2f}%" if div_yield else "<b>Dividend Yield:</b> N/A", unsafe_allow_html=True)
+                beta = stock_data.get('beta')
+                st.markdown(f"<b>Beta:</b> {beta:.2f}" if beta else "<b>Beta:</b> N/A", unsafe_allow_html=True)
+                fwd_pe = stock_data.get('forward_pe')
+                st.markdown(f"<b>Forward P/E:</b> {fwd_pe:.1f}" if fwd_pe else "<b>Forward P/E:</b> N/A", unsafe_allow_html=True)
+            with d3:
+                emp = stock_data.get('employees')
+                st.markdown(f"<b>Employees:</b> {emp:,}" if emp else "<b>Employees:</b> N/A", unsafe_allow_html=True)
+                rev = stock_data.get('revenue')
+                st.markdown(f"<b>Revenue:</b> {format_market_cap(rev)}" if rev else "<b>Revenue:</b> N/A", unsafe_allow_html=True)
+                margin = stock_data.get('profit_margin')
+                st.markdown(f"<b>Profit Margin:</b> {margin*100:.1f}%" if margin else "<b>Profit Margin:</b> N/A", unsafe_allow_html=True)
+    else:
+        # Private company indicator
+        st.info("**Private Company** - This company is not publicly traded. No stock data available.")
+
+    st.markdown("---")
+
+    # Styled Executive Summary with blue border
+    executive_summary = swot_data.get('executive_summary', swot_data.get('summary', 'No summary available.'))
+    st.markdown(f"""
+    <div style="border-left: 5px solid #1E90FF; padding: 15px; background-color: rgba(30, 144, 255, 0.1); border-radius: 5px;">
+        <h4 style="margin-top: 0;">Executive Summary</h4>
+        <p>{executive_summary}</p>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("")
+
+    # Display Market Analysis if available
+    market_analysis = swot_data.get('market_analysis', '')
+    if market_analysis:
+        st.markdown("### Market Analysis")
+        st.markdown(market_analysis)
+
+    st.markdown("---")
+
+    # Display the SWOT analysis in a 2x2 grid with colored backgrounds
+    st.markdown("### SWOT Analysis")
+
+    for i, row in enumerate((SWOT_CARDS[:2], SWOT_CARDS[2:])):
+        if i:
+            st.markdown("")
+        for col, (key, title, rgb) in zip(st.columns(2), row):
+            with col:
+                render_bullet_card(title, rgb, bullets[key], f"No {key} listed")
+
+    st.markdown("---")
+
+    # Display Competitive Analysis Section
+    st.markdown("### Competitive Analysis")
+
+    # Competitive Position Summary
+    comp_position = competitive_analysis.get('competitive_position', '')
+    if comp_position:
+        st.markdown(f"""
+        <div style="border-left: 5px solid #9b59b6; padding: 15px; background-color: rgba(155, 89, 182, 0.1); border-radius: 5px; margin-bottom: 15px;">
+            <h4 style="margin-top: 0;">Competitive Position</h4>
+            <p>{comp_position}</p>
+        </div>
+        """, unsafe_allow_html=True)
+
+    # Competitor Comparison Table
+    if competitors_data:
+        st.markdown("#### Key Competitors")
+
+        # Build comparison data
+        table_data = []
+        for comp in competitors_data:
+            row = {
+                "Company": comp.get('name', 'N/A'),
+                "Market Cap": format_market_cap(comp.get('market_cap')) if comp.get('market_cap') else "Private",
+                "P/E Ratio": f"{comp.get('pe_ratio'):.1f}" if comp.get('pe_ratio') else "N/A",
+                "1Y Return": f"{comp.get('year_return'):.1f}%" if comp.get('year_return') else "N/A",
+                "Revenue": format_market_cap(comp.get('revenue')) if comp.get('revenue') else "N/A"
+            }
+            table_data.append(row)
+
+        # Add target company to top of table for comparison
+        if stock_data:
+            target_row = {
+                "Company": f"{display_name} (Target)",
+                "Market Cap": stock_data['market_cap_label'] if stock_data.get('market_cap') else "Private",
+                "P/E Ratio": stock_data['pe_label'],
+                "1Y Return": stock_data['year_return_label'],
+                "Revenue": format_market_cap(stock_data.get('revenue')) if stock_data.get('revenue') else "N/A"
+            }
+            table_data.insert(0, target_row)
+
+        # Display as DataFrame without index
+        df = pd.DataFrame(table_data)
+        st.dataframe(df, hide_index=True, use_container_width=True)
+
+    # Competitive Advantages and Disadvantages in two columns
+    adv_col, disadv_col = st.columns(2)
+    with adv_col:
+        render_bullet_card("Competitive Advantages", (40, 167, 69), bullets['competitive_advantages'],
+                           "No advantages identified")
+    with disadv_col:
+        render_bullet_card("Competitive Disadvantages", (220, 53, 69), bullets['competitive_disadvantages'],
+                           "No disadvantages identified")
+
+    st.markdown("")
+
+    # Key Differentiators
+    with st.expander("Key Differentiators", expanded=False):
+        for diff in bullets['key_differentiators']:
+            st.markdown(f"- {diff}")
+
+    # Valuation Comparison
+    valuation_comp = competitive_analysis.get('valuation_comparison', '')
+    if valuation_comp:
+        st.markdown("#### Valuation Comparison")
+        st.markdown(valuation_comp)
+
+    # Competitive Outlook
+    comp_outlook = competitive_analysis.get('competitive_outlook', '')
+    if comp_outlook:
+        st.markdown("#### Competitive Outlook")
+        st.markdown(comp_outlook)
+
+    st.markdown("---")
+
+    # Display Strategic Recommendations in expandable section
+    if bullets['strategic_recommendations']:
+        with st.expander("Strategic Recommendations", expanded=True):
+            for rec in bullets['strategic_recommendations']:
+                st.markdown(f"- {rec}")
+
+    # Display Investment Considerations if available
     investment_considerations = swot_data.get('investment_considerations', '')
     if investment_considerations:
-        pdf.set_font("Arial", "B", 14)
-        pdf.set_text_color(0, 51, 102)  # Dark blue
-        pdf.set_x(pdf.l_margin)
-        pdf.cell(effective_width, 10, "Investment Considerations", new_x="LMARGIN", new_y="NEXT")
-        pdf.set_text_color(0, 0, 0)
-        pdf.set_font("Arial", "", 11)
-        pdf.set_x(pdf.l_margin)
-        pdf.multi_cell(effective_width, 6, sanitize_text(investment_considerations))
+        st.markdown("### Investment Considerations")
+        st.markdown(investment_considerations)
+        st.markdown("---")
 
-    filename = f"{company_name}_Memo.pdf"
-    pdf.output(filename)
-    return filename
+    # Display Stock Price Chart (for public companies); the history is only fetched and drawn while its expander is open
+    if stock_data and stock_data.get('ticker'):
+        chart_section = st.expander("Stock Price History (1 Year)", key=f"chart::{stock_data['ticker']}", on_change="rerun")
+        if chart_section.open:
+            with chart_section:
+                try:
+                    hist_data = fetch_history(stock_data['ticker'])
+
+                    if not hist_data.empty:
+                        # Use Streamlit's line chart with the Close price
+                        chart_data = hist_data.rename(columns={'Close': 'Price'})
+                        st.line_chart(chart_data, use_container_width=True)
+
+                        # Show period stats
+                        period_high = hist_data['Close'].max()
+                        period_low = hist_data['Close'].min()
+                        curr_sym = stock_data.get('currency_symbol', '$')
+                        curr_sym_html = curr_sym.replace('$', '&#36;')
+                        st.markdown(f"<small style='color: #666;'>52-week range: {curr_sym_html}{period_low:.2f} - {curr_sym_html}{period_high:.2f}</small>", unsafe_allow_html=True)
+                    else:
+                        st.info("Stock price history not available.")
+                except Exception as e:
+                    st.warning(f"Could not load stock chart: {e}")
+        st.markdown("---")
+
+    # Keep the bytes with the result; later reruns (including the download click itself) reuse them
+    if pdf_future is not None:
+        with st.spinner('Generating PDF...'):
+            result['pdf'] = pdf_future.result()
+
+    # Show a large 'Download PDF' button using st.download_button
+    st.download_button(
+        label='Download Investment Memo PDF',
+        data=result['pdf'],
+        file_name=f"{company_name}_Memo.pdf",
+        mime='application/pdf',
+        use_container_width=True
+    )
 
 
 # The Sidebar
 st.sidebar.header("💰 Scott's Company Analysis")
 company_name = st.sidebar.text_input('Company Name', placeholder='Enter company name...')
+force_refresh = st.sidebar.checkbox('Force refresh', help='Ignore cached search results and website scrapes')
 generate_button = st.sidebar.button('Generate Memo', type='primary')
 
 
@@ -884,392 +1393,26 @@ generate_button = st.sidebar.button('Generate Memo', type='primary')
 if generate_button:
     if not company_name:
         st.error('Please enter a company name')
+        st.session_state['shown_result'] = None
     else:
-        # Show progress with status spinner
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        try:
-            # Step 1: Check if company is publicly traded
-            status_text.text('Checking if company is publicly traded...')
-            progress_bar.progress(10)
-            ticker = get_ticker_symbol(company_name)
-
-            # Step 2: Fetch stock data if public
-            stock_data = None
-            if ticker:
-                status_text.text(f'Fetching stock data for {ticker}...')
-                progress_bar.progress(20)
-                stock_data = fetch_stock_data(ticker)
-
-            # Step 3: Get company info
-            status_text.text('Searching for company information...')
-            progress_bar.progress(35)
-            url, search_summary = get_company_info(company_name)
-
-            if not url:
-                st.error(f'Could not find website for {company_name}')
-            else:
-                # Step 4: Analyze website
-                status_text.text('Scraping company website...')
-                progress_bar.progress(55)
-                website_content = analyze_website(url)
-
-                # Step 5: Generate Analysis with stock context
-                status_text.text('Analyzing data and generating company analysis...')
-                progress_bar.progress(60)
-                swot_data = generate_swot(company_name, search_summary, website_content, stock_data)
-
-                # Step 6: Identify competitors
-                status_text.text('Identifying competitors...')
-                progress_bar.progress(70)
-                industry = stock_data.get('industry') if stock_data else None
-                competitors = get_competitors(company_name, industry)
-
-                # Step 7: Fetch competitor data
-                status_text.text('Fetching competitor data...')
-                progress_bar.progress(80)
-                competitors_data = []
-                for comp in competitors[:4]:  # Limit to 4 competitors
-                    comp_data = fetch_competitor_data(comp.get('name', ''))
-                    comp_data['reason'] = comp.get('reason', '')
-                    competitors_data.append(comp_data)
-
-                # Step 8: Generate competitive analysis
-                status_text.text('Generating competitive analysis...')
-                progress_bar.progress(90)
-                competitive_analysis = generate_competitive_analysis(company_name, stock_data, competitors_data)
-
-                progress_bar.progress(100)
-                status_text.text('Analysis complete!')
-                progress_bar.empty()
-                status_text.empty()
-
-                # Format company name with title case
-                display_name = company_name.title()
-
-                # Display company name as title (with exchange:ticker for public companies) in styled header
-                if stock_data and stock_data.get('ticker'):
-                    exchange = stock_data.get('exchange', '')
-                    ticker_display = stock_data.get('ticker', '')
-                    # Remove suffix from ticker for cleaner display (e.g., SHOP.TO -> SHOP)
-                    ticker_clean = ticker_display.split('.')[0] if '.' in ticker_display else ticker_display
-                    # Format as "Exchange: TICKER" (e.g., "TSX: SHOP")
-                    ticker_info = f"{exchange}: {ticker_clean}" if exchange else ticker_clean
-                    st.markdown(f"""
-                    <div style="background-color: rgba(128, 128, 128, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px; border: 1px solid rgba(128, 128, 128, 0.2);">
-                        <h1 style="margin: 0;">{display_name} <span style="font-weight: normal; font-size: 0.5em; opacity: 0.7;">({ticker_info})</span></h1>
-                    </div>
-                    """, unsafe_allow_html=True)
-                else:
-                    st.markdown(f"""
-                    <div style="background-color: rgba(128, 128, 128, 0.1); padding: 20px; border-radius: 10px; margin-bottom: 20px; border: 1px solid rgba(128, 128, 128, 0.2);">
-                        <h1 style="margin: 0;">{display_name}</h1>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Display Stock Metrics (for public companies)
-                if stock_data and stock_data.get('current_price'):
-                    st.markdown("### Financial Metrics")
-                    m1, m2, m3, m4 = st.columns(4)
-                    with m1:
-                        price = stock_data.get('current_price')
-                        last_trade = stock_data.get('last_trade_time')
-                        currency_symbol = stock_data.get('currency_symbol', '$')
-                        price_label = f"{currency_symbol}{price:.2f}" if price else "N/A"
-                        st.metric("Stock Price", price_label)
-                        if last_trade:
-                            st.caption(f"Last updated: {last_trade}")
-                    with m2:
-                        st.metric("Market Cap", format_market_cap(stock_data.get('market_cap')))
-                    with m3:
-                        yr = stock_data.get('year_return')
-                        delta_color = "normal" if yr and yr >= 0 else "inverse"
-                        st.metric("1-Year Return", f"{yr:.1f}%" if yr else "N/A",
-                                  delta=f"{yr:.1f}%" if yr else None,
-                                  delta_color=delta_color if yr else "off")
-                    with m4:
-                        pe = stock_data.get('pe_ratio')
-                        st.metric("P/E Ratio", f"{pe:.1f}" if pe else "N/A")
-
-                    # Expandable Market Details
-                    with st.expander("More Market Details"):
-                        d1, d2, d3 = st.columns(3)
-                        with d1:
-                            low = stock_data.get('fifty_two_week_low')
-                            high = stock_data.get('fifty_two_week_high')
-                            curr_sym = stock_data.get('currency_symbol', '$')
-                            # Use HTML entity &#36; for $ to avoid LaTeX interpretation
-                            curr_sym_html = curr_sym.replace('$', '&#36;')
-                            if low and high:
-                                st.markdown(f"<b>52-Week Range:</b> {curr_sym_html}{low:.2f} - {curr_sym_html}{high:.2f}", unsafe_allow_html=True)
-                            else:
-                                st.markdown("<b>52-Week Range:</b> N/A", unsafe_allow_html=True)
-                            st.markdown(f"<b>Sector:</b> {stock_data.get('sector', 'N/A')}", unsafe_allow_html=True)
-                            st.markdown(f"<b>Industry:</b> {stock_data.get('industry', 'N/A')}", unsafe_allow_html=True)
-                        with d2:
-                            div_yield = stock_data.get('dividend_yield')
-                            st.markdown(f"<b>Dividend Yield:</b> {div_yield*100:.2f}%" if div_yield else "<b>Dividend Yield:</b> N/A", unsafe_allow_html=True)
-                            beta = stock_data.get('beta')
-                            st.markdown(f"<b>Beta:</b> {beta:.2f}" if beta else "<b>Beta:</b> N/A", unsafe_allow_html=True)
-                            fwd_pe = stock_data.get('forward_pe')
-                            st.markdown(f"<b>Forward P/E:</b> {fwd_pe:.1f}" if fwd_pe else "<b>Forward P/E:</b> N/A", unsafe_allow_html=True)
-                        with d3:
-                            emp = stock_data.get('employees')
-                            st.markdown(f"<b>Employees:</b> {emp:,}" if emp else "<b>Employees:</b> N/A", unsafe_allow_html=True)
-                            rev = stock_data.get('revenue')
-                            st.markdown(f"<b>Revenue:</b> {format_market_cap(rev)}" if rev else "<b>Revenue:</b> N/A", unsafe_allow_html=True)
-                            margin = stock_data.get('profit_margin')
-                            st.markdown(f"<b>Profit Margin:</b> {margin*100:.1f}%" if margin else "<b>Profit Margin:</b> N/A", unsafe_allow_html=True)
-                else:
-                    # Private company indicator
-                    st.info("**Private Company** - This company is not publicly traded. No stock data available.")
-
-                st.markdown("---")
-
-                # Styled Executive Summary with blue border
-                executive_summary = swot_data.get('executive_summary', swot_data.get('summary', 'No summary available.'))
-                st.markdown(f"""
-                <div style="border-left: 5px solid #1E90FF; padding: 15px; background-color: rgba(30, 144, 255, 0.1); border-radius: 5px;">
-                    <h4 style="margin-top: 0;">Executive Summary</h4>
-                    <p>{executive_summary}</p>
-                </div>
-                """, unsafe_allow_html=True)
-
-                st.markdown("")
-
-                # Display Market Analysis if available
-                market_analysis = swot_data.get('market_analysis', '')
-                if market_analysis:
-                    st.markdown("### Market Analysis")
-                    st.markdown(market_analysis)
-
-                st.markdown("---")
-
-                # Display the SWOT analysis in a 2x2 grid with colored backgrounds
-                st.markdown("### SWOT Analysis")
-
-                # Row 1: Strengths and Weaknesses
-                row1_col1, row1_col2 = st.columns(2)
-
-                with row1_col1:
-                    st.markdown("""
-                    <div style="background-color: rgba(40, 167, 69, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #28a745; font-weight: bold;">✅ Strengths</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    strengths = swot_data.get('strengths', [])
-                    if strengths:
-                        for strength in strengths:
-                            st.markdown(f"• {strength}")
-                    else:
-                        st.markdown("*No strengths listed*")
-
-                with row1_col2:
-                    st.markdown("""
-                    <div style="background-color: rgba(220, 53, 69, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #dc3545; font-weight: bold;">⚠️ Weaknesses</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    weaknesses = swot_data.get('weaknesses', [])
-                    if weaknesses:
-                        for weakness in weaknesses:
-                            st.markdown(f"• {weakness}")
-                    else:
-                        st.markdown("*No weaknesses listed*")
-
-                st.markdown("")
-
-                # Row 2: Opportunities and Threats
-                row2_col1, row2_col2 = st.columns(2)
-
-                with row2_col1:
-                    st.markdown("""
-                    <div style="background-color: rgba(0, 123, 255, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #007bff; font-weight: bold;">🚀 Opportunities</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    opportunities = swot_data.get('opportunities', [])
-                    if opportunities:
-                        for opportunity in opportunities:
-                            st.markdown(f"• {opportunity}")
-                    else:
-                        st.markdown("*No opportunities listed*")
-
-                with row2_col2:
-                    st.markdown("""
-                    <div style="background-color: rgba(255, 193, 7, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #ffc107; font-weight: bold;">🛡️ Threats</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    threats = swot_data.get('threats', [])
-                    if threats:
-                        for threat in threats:
-                            st.markdown(f"• {threat}")
-                    else:
-                        st.markdown("*No threats listed*")
-
-                st.markdown("---")
-
-                # Display Competitive Analysis Section
-                st.markdown("### Competitive Analysis")
-
-                # Competitive Position Summary
-                comp_position = competitive_analysis.get('competitive_position', '')
-                if comp_position:
-                    st.markdown(f"""
-                    <div style="border-left: 5px solid #9b59b6; padding: 15px; background-color: rgba(155, 89, 182, 0.1); border-radius: 5px; margin-bottom: 15px;">
-                        <h4 style="margin-top: 0;">Competitive Position</h4>
-                        <p>{comp_position}</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-                # Competitor Comparison Table
-                if competitors_data:
-                    st.markdown("#### Key Competitors")
-
-                    # Build comparison data
-                    table_data = []
-                    for comp in competitors_data:
-                        row = {
-                            "Company": comp.get('name', 'N/A'),
-                            "Market Cap": format_market_cap(comp.get('market_cap')) if comp.get('market_cap') else "Private",
-                            "P/E Ratio": f"{comp.get('pe_ratio'):.1f}" if comp.get('pe_ratio') else "N/A",
-                            "1Y Return": f"{comp.get('year_return'):.1f}%" if comp.get('year_return') else "N/A",
-                            "Revenue": format_market_cap(comp.get('revenue')) if comp.get('revenue') else "N/A"
-                        }
-                        table_data.append(row)
-
-                    # Add target company to top of table for comparison
-                    if stock_data:
-                        target_row = {
-                            "Company": f"{display_name} (Target)",
-                            "Market Cap": format_market_cap(stock_data.get('market_cap')) if stock_data.get('market_cap') else "Private",
-                            "P/E Ratio": f"{stock_data.get('pe_ratio'):.1f}" if stock_data.get('pe_ratio') else "N/A",
-                            "1Y Return": f"{stock_data.get('year_return'):.1f}%" if stock_data.get('year_return') else "N/A",
-                            "Revenue": format_market_cap(stock_data.get('revenue')) if stock_data.get('revenue') else "N/A"
-                        }
-                        table_data.insert(0, target_row)
-
-                    # Display as DataFrame without index
-                    df = pd.DataFrame(table_data)
-                    st.dataframe(df, hide_index=True, use_container_width=True)
-
-                # Competitive Advantages and Disadvantages in two columns
-                adv_col, disadv_col = st.columns(2)
-
-                with adv_col:
-                    st.markdown("""
-                    <div style="background-color: rgba(40, 167, 69, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #28a745; font-weight: bold;">Competitive Advantages</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    advantages = competitive_analysis.get('competitive_advantages', [])
-                    if advantages:
-                        for adv in advantages:
-                            st.markdown(f"• {adv}")
-                    else:
-                        st.markdown("*No advantages identified*")
-
-                with disadv_col:
-                    st.markdown("""
-                    <div style="background-color: rgba(220, 53, 69, 0.2); padding: 10px 15px; border-radius: 8px 8px 0 0;">
-                        <span style="color: #dc3545; font-weight: bold;">Competitive Disadvantages</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    disadvantages = competitive_analysis.get('competitive_disadvantages', [])
-                    if disadvantages:
-                        for disadv in disadvantages:
-                            st.markdown(f"• {disadv}")
-                    else:
-                        st.markdown("*No disadvantages identified*")
-
-                st.markdown("")
-
-                # Key Differentiators
-                with st.expander("Key Differentiators", expanded=False):
-                    differentiators = competitive_analysis.get('key_differentiators', [])
-                    if differentiators:
-                        for diff in differentiators:
-                            st.markdown(f"- {diff}")
-
-                # Valuation Comparison
-                valuation_comp = competitive_analysis.get('valuation_comparison', '')
-                if valuation_comp:
-                    st.markdown("#### Valuation Comparison")
-                    st.markdown(valuation_comp)
-
-                # Competitive Outlook
-                comp_outlook = competitive_analysis.get('competitive_outlook', '')
-                if comp_outlook:
-                    st.markdown("#### Competitive Outlook")
-                    st.markdown(comp_outlook)
-
-                st.markdown("---")
-
-                # Display Strategic Recommendations in expandable section
-                strategic_recs = swot_data.get('strategic_recommendations', [])
-                if strategic_recs:
-                    with st.expander("Strategic Recommendations", expanded=True):
-                        for rec in strategic_recs:
-                            st.markdown(f"- {rec}")
-
-                # Display Investment Considerations if available
-                investment_considerations = swot_data.get('investment_considerations', '')
-                if investment_considerations:
-                    st.markdown("### Investment Considerations")
-                    st.markdown(investment_considerations)
-                    st.markdown("---")
-
-                # Display Stock Price Chart (for public companies)
-                if stock_data and stock_data.get('ticker'):
-                    st.markdown("### Stock Price History (1 Year)")
-                    try:
-                        ticker_symbol = stock_data.get('ticker')
-                        stock_chart = yf.Ticker(ticker_symbol)
-                        hist_data = stock_chart.history(period="1y")
-
-                        if not hist_data.empty:
-                            # Use Streamlit's line chart with the Close price
-                            chart_data = hist_data[['Close']].copy()
-                            chart_data.columns = ['Price']
-                            st.line_chart(chart_data, use_container_width=True)
-
-                            # Show period stats
-                            period_high = hist_data['Close'].max()
-                            period_low = hist_data['Close'].min()
-                            curr_sym = stock_data.get('currency_symbol', '$')
-                            curr_sym_html = curr_sym.replace('$', '&#36;')
-                            st.markdown(f"<small style='color: #666;'>52-week range: {curr_sym_html}{period_low:.2f} - {curr_sym_html}{period_high:.2f}</small>", unsafe_allow_html=True)
-                        else:
-                            st.info("Stock price history not available.")
-                    except Exception as e:
-                        st.warning(f"Could not load stock chart: {e}")
-                    st.markdown("---")
-
-                # Generate the PDF in the background
-                with st.spinner('Generating PDF...'):
-                    pdf_filename = save_pdf(company_name, swot_data, stock_data, competitive_analysis, competitors_data)
-
-                    # Read the PDF file
-                    with open(pdf_filename, 'rb') as pdf_file:
-                        pdf_bytes = pdf_file.read()
-
-                # Show a large 'Download PDF' button using st.download_button
-                st.download_button(
-                    label='Download Investment Memo PDF',
-                    data=pdf_bytes,
-                    file_name=pdf_filename,
-                    mime='application/pdf',
-                    use_container_width=True
-                )
-
-        except Exception as e:
-            st.error(f'Error: {str(e)}')
-            progress_bar.empty()
-            status_text.empty()
-
-else:
+        # Reuse this session's result for the company if it is fresh enough; Force refresh always reruns
+        result_key = f"result::{company_name.lower()}"
+        result = st.session_state.get(result_key)
+        if force_refresh or result is None or time.time() - result['ts'] > RESULT_TTL:
+            result = run_analysis(company_name, force_refresh)
+            if result:
+                st.session_state[result_key] = result
+        st.session_state['shown_result'] = result_key if result else None
+
+# Every rerun (e.g. clicking Download) redraws the current memo from session state instead of the API pipeline
+shown_key = st.session_state.get('shown_result')
+shown_result = st.session_state.get(shown_key) if shown_key else None
+if shown_result:
+    try:
+        render_memo(shown_result)
+    except Exception as e:
+        st.error(f'Error: {str(e)}')
+elif not generate_button:
     # Initial state - show welcome message
     st.title("💰 Scott's Company Analysis")
     st.markdown("""
@@ -1282,3 +1425,7 @@ else:
     
     Get started by entering a company name in the sidebar! 👈
     """)
+
+# LLM cache counters (cumulative for this server process), including OpenAI's own prompt-cache hits
+st.sidebar.caption(f"LLM cache: {llm_cache_stats['hits']} hits / {llm_cache_stats['misses']} misses")
+st.sidebar.caption(f"OpenAI prompt cache: {llm_cache_stats['cached_tokens']:,} of {llm_cache_stats['prompt_tokens']:,} prompt tokens")
@@ -0,0 +1,296 @@
+import time
+import zlib
+import sqlite3
+import threading
+import hashlib
+import functools
+import orjson
+from collections import OrderedDict
+import numpy as np
+from contextlib import closing
+from config import get_encoder, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_SEMANTIC_THRESHOLD
+
+# Model used for semantic-cache embeddings
+EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# In-process layer for disk_cache: namespaced cache key -> (created, result), least recently used first. Kept
+# here rather than in the decorator because Streamlit re-executes the decorated script (and so the decorator)
+# on every rerun. Bounded so a long-running server doesn't keep every result it has ever seen.
+_MEMORY = OrderedDict()
+_MEMORY_MAXSIZE = 512
+# Streamlit sessions and their worker threads share _MEMORY
+_MEMORY_LOCK = threading.Lock()
+
+# Hit/miss counters for this process, plus prompt tokens sent and how many OpenAI served from its prompt cache
+stats = {'hits': 0, 'misses': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+
+
+def truncate_tokens(text, max_tokens):
+    """Cut text to at most max_tokens gpt-4o-mini tokens."""
+    # Scraped pages may contain strings like '<|endoftext|>'; treat them as plain text
+    enc = get_encoder()
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+def _connect():
+    """Open the cache database, creating the table on first use."""
+    conn = sqlite3.connect(LLM_CACHE_PATH)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response BLOB, created REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS semantic (namespace TEXT, embedding BLOB, response BLOB, created REAL)"
+    )
+    return conn
+
+
+def _make_key(kwargs):
+    """Hash the request arguments (model, messages, response_format, ...) into a cache key."""
+    return hashlib.sha256(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _load(key):
+    """Return the (compressed response, created time) row for key, or None."""
+    with closing(_connect()) as conn:
+        return conn.execute(
+            "SELECT response, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+
+def _get(key, ttl=LLM_CACHE_TTL, track=True):
+    """Return the cached response text for key, or None if missing or older than ttl seconds (counted in stats if track)."""
+    row = _load(key)
+    hit = row is not None and time.time() - row[1] <= ttl
+    if track:
+        stats['hits' if hit else 'misses'] += 1
+    if not hit:
+        return None
+    return zlib.decompress(row[0]).decode('utf-8')
+
+
+def _put(key, content):
+    """Store the response text for key (zlib-compressed to keep the file small)."""
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created) VALUES (?, ?, ?)",
+            (key, zlib.compress(content.encode('utf-8')), time.time())
+        )
+
+
+def cached_completion(ttl=LLM_CACHE_TTL, **kwargs):
+    """Return the on-disk cached content for exactly this request, or None, without calling the API."""
+    content = _get(_make_key(kwargs), ttl, track=False)
+    if content is not None:
+        stats['hits'] += 1
+    return content
+
+
+def _record_usage(response):
+    """Add a completion's prompt token counts (total and served from OpenAI's prompt cache) to stats."""
+    usage = getattr(response, 'usage', None)
+    if usage is None:
+        return
+    details = getattr(usage, 'prompt_tokens_details', None)
+    stats['prompt_tokens'] += usage.prompt_tokens or 0
+    stats['cached_tokens'] += getattr(details, 'cached_tokens', None) or 0
+
+
+def _is_cacheable(kwargs, use_cache=False):
+    """Only deterministic (temperature=0) requests are safe to replay from disk, unless the caller opts in."""
+    return use_cache or kwargs.get('temperature') == 0
+
+
+def cached_chat_completion(client, ttl=LLM_CACHE_TTL, use_cache=False, **kwargs):
+    """Call client.chat.completions.create(**kwargs) and return the message content, served from disk for up to ttl seconds.
+
+    use_cache=True also caches requests with temperature > 0.
+    """
+    if not _is_cacheable(kwargs, use_cache):
+        response = client.chat.completions.create(**kwargs)
+        _record_usage(response)
+        return response.choices[0].message.content
+
+    key = _make_key(kwargs)
+    content = _get(key, ttl)
+    if content is None:
+        response = client.chat.completions.create(**kwargs)
+        _record_usage(response)
+        content = response.choices[0].message.content
+        _put(key, content)
+    return content
+
+
+async def async_cached_chat_completion(client, ttl=LLM_CACHE_TTL, use_cache=False, **kwargs):
+    """Same as cached_chat_completion, for an AsyncOpenAI client."""
+    if not _is_cacheable(kwargs, use_cache):
+        response = await client.chat.completions.create(**kwargs)
+        _record_usage(response)
+        return response.choices[0].message.content
+
+    key = _make_key(kwargs)
+    content = _get(key, ttl)
+    if content is None:
+        response = await client.chat.completions.create(**kwargs)
+        _record_usage(response)
+        content = response.choices[0].message.content
+        _put(key, content)
+    return content
+
+
+def stream_chat_completion(client, ttl=LLM_CACHE_TTL, use_cache=False, cache_key=None, **kwargs):
+    """Stream the message content as text chunks. A cache hit yields the whole cached content at once.
+
+    cache_key, if given, replaces the request arguments as what identifies the cached response (e.g. to leave
+    out prompt fields that change between otherwise identical requests).
+    """
+    cacheable = _is_cacheable(kwargs, use_cache)
+    key = _make_key(kwargs if cache_key is None else cache_key) if cacheable else None
+    if cacheable:
+        content = _get(key, ttl)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    # include_usage adds a final chunk (with no choices) carrying the token counts
+    for chunk in client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs):
+        _record_usage(chunk)
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    if cacheable:
+        _put(key, "".join(parts))
+
+
+async def async_stream_chat_completion(client, ttl=LLM_CACHE_TTL, use_cache=False, cache_key=None, **kwargs):
+    """Same as stream_chat_completion, for an AsyncOpenAI client."""
+    cacheable = _is_cacheable(kwargs, use_cache)
+    key = _make_key(kwargs if cache_key is None else cache_key) if cacheable else None
+    if cacheable:
+        content = _get(key, ttl)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    async for chunk in await client.chat.completions.create(stream=True, stream_options={"include_usage": True}, **kwargs):
+        _record_usage(chunk)
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            parts.append(delta)
+            yield delta
+
+    if cacheable:
+        _put(key, "".join(parts))
+
+
+def parse_partial_json(text):
+    """Parse a JSON object that is still being streamed by closing any open string, array and object.
+
+    Returns None when the text can't be completed yet (e.g. it stops inside a key).
+    """
+    closers = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            closers.append('}' if ch == '{' else ']')
+        elif ch in '}]' and closers:
+            closers.pop()
+
+    candidate = (text + '"' if in_string else text).rstrip().rstrip(',')
+    try:
+        return orjson.loads(candidate + ''.join(reversed(closers)))
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _remember(cache_key, entry):
+    """Store entry in the in-process layer as most recently used, evicting the least recently used past the size cap."""
+    with _MEMORY_LOCK:
+        _MEMORY[cache_key] = entry
+        _MEMORY.move_to_end(cache_key)
+        if len(_MEMORY) > _MEMORY_MAXSIZE:
+            _MEMORY.popitem(last=False)
+
+
+def disk_cache(namespace, ttl, key=None, cache_if=bool):
+    """Decorator caching a function's JSON-serializable result in the same database for ttl seconds.
+
+    key(*args) picks what identifies a call (default: all args). Results failing cache_if are not stored.
+    The wrapped function takes an extra use_cache keyword; pass use_cache=False to refetch.
+    Results are also kept in memory with their creation time, so repeat calls in this process skip SQLite.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, use_cache=True):
+            cache_key = f"{namespace}:{_make_key(key(*args) if key else args)}"
+            if use_cache:
+                # Memory entries expire on the same clock as the database rows
+                entry = _MEMORY.get(cache_key)
+                if entry is None:
+                    row = _load(cache_key)
+                    if row is not None:
+                        entry = (row[1], orjson.loads(zlib.decompress(row[0])))
+                if entry is not None and time.time() - entry[0] <= ttl:
+                    _remember(cache_key, entry)
+                    return entry[1]
+                # Expired (or missing): don't keep it in memory until the key happens to be fetched again
+                with _MEMORY_LOCK:
+                    _MEMORY.pop(cache_key, None)
+
+            result = func(*args)
+            if cache_if(result):
+                _put(cache_key, orjson.dumps(result).decode('utf-8'))
+                _remember(cache_key, (time.time(), result))
+            return result
+        return wrapper
+    return decorator
+
+
+async def async_embed(client, text):
+    """Embed text with an AsyncOpenAI client and return a unit-length float32 vector."""
+    response = await client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
+    return embedding / np.linalg.norm(embedding)
+
+
+def semantic_lookup(namespace, embedding, threshold=LLM_SEMANTIC_THRESHOLD):
+    """Return the cached response in namespace most similar to embedding, or None below threshold."""
+    with closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT embedding, response FROM semantic WHERE namespace = ? AND created >= ?",
+            (namespace, time.time() - LLM_CACHE_TTL)
+        ).fetchall()
+    if not rows:
+        return None
+
+    # Stored vectors are unit length, so one matrix-vector product gives all cosine similarities
+    matrix = np.stack([np.frombuffer(row[0], dtype=np.float32) for row in rows])
+    scores = matrix @ embedding
+    best = int(np.argmax(scores))
+    if scores[best] < threshold:
+        return None
+    return zlib.decompress(rows[best][1]).decode('utf-8')
+
+
+def semantic_store(namespace, embedding, content):
+    """Remember content under embedding for later semantic lookups."""
+    with closing(_connect()) as conn, conn:
+        conn.execute(
+            "INSERT INTO semantic (namespace, embedding, response, created) VALUES (?, ?, ?, ?)",
+            (namespace, embedding.astype(np.float32).tobytes(), zlib.compress(content.encode('utf-8')), time.time())
+        )